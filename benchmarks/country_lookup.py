@@ -0,0 +1,49 @@
+"""Compare country code lookups through pycountry and the precomputed table.
+
+Run from the repository root with: python -m benchmarks.country_lookup
+The first request cost is measured in a fresh interpreter, as a new worker would pay it.
+"""
+
+import subprocess
+import sys
+import timeit
+
+FIRST_LOOKUP = {
+    "pycountry": "import pycountry; pycountry.countries.get(alpha_2='it').name",
+    "table": (
+        "from weather_api.weather_requests.countries import country_name; country_name('it')"
+    ),
+}
+
+STEADY_STATE = {
+    "pycountry": ("pycountry.countries.get(alpha_2='it').name", "import pycountry"),
+    "table": (
+        "country_name('it')",
+        "from weather_api.weather_requests.countries import country_name",
+    ),
+}
+
+
+def first_lookup_ms(statement: str) -> float:
+    """Milliseconds to import and run the first lookup in a new interpreter."""
+    runs = []
+    for _ in range(5):
+        code = f"import time; s = time.perf_counter(); {statement}; print(time.perf_counter() - s)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, check=True)
+        runs.append(float(output.stdout) * 1000)
+    return min(runs)
+
+
+def main() -> None:
+    for name, statement in FIRST_LOOKUP.items():
+        steady_statement, setup = STEADY_STATE[name]
+        number = 100_000
+        steady = min(timeit.repeat(steady_statement, setup, number=number, repeat=5))
+        print(
+            f"{name:>10}: first lookup {first_lookup_ms(statement):8.2f} ms, "
+            f"steady state {steady / number * 1e9:8.1f} ns"
+        )
+
+
+if __name__ == "__main__":
+    main()
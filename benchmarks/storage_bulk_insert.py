@@ -0,0 +1,73 @@
+"""Compare saving forecasts through the ORM unit of work and the bulk upsert path.
+
+Run from the repository root with: python -m benchmarks.storage_bulk_insert
+Each round saves a batch of cities with a forecast of ten days into a SQLite file,
+as the write-behind queue does. The target of the bulk path is 10k rows/s.
+"""
+
+from datetime import datetime, timedelta, timezone
+import asyncio
+import tempfile
+import time
+
+from weather_api.weather_requests.clients.storage_clients.storage_clients import DBStorageClient
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+from weather_api.weather_requests.storage_handlers import build_storage_entries
+from weather_api.weather_requests.weather_db_engine import Database, create_schema, get_engine
+
+CITIES = 100
+DAYS = 10
+ROUNDS = 20
+
+
+def forecast_batches(round_number: int) -> list[ForecastBatch]:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(days=round_number)
+    return [
+        ForecastBatch(
+            city_name=f"City {city}",
+            country="Italy",
+            dates=[start + timedelta(days=day) for day in range(DAYS)],
+            temperatures=[10.0 + day for day in range(DAYS)],
+            weather_conditions=["Sunny"] * DAYS,
+            wind_speeds=[3.5] * DAYS,
+            humidities=[60.0] * DAYS,
+        )
+        for city in range(CITIES)
+    ]
+
+
+async def orm_save(client: DBStorageClient, batches: list[ForecastBatch]) -> None:
+    new_cities: dict = {}
+    entries = []
+    for batch in batches:
+        entries.extend(await build_storage_entries(client, batch, new_cities))
+    client.save(entries)
+
+
+async def bulk_save(client: DBStorageClient, batches: list[ForecastBatch]) -> None:
+    client.save_forecasts(batches)
+
+
+async def rows_per_second(save) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = get_engine(f"sqlite:///{directory}/benchmark.db")
+        create_schema(engine)
+        database = Database.of(engine)
+        elapsed = 0.0
+        for round_number in range(ROUNDS):
+            batches = forecast_batches(round_number)
+            with database.sessions() as session:
+                start = time.perf_counter()
+                await save(DBStorageClient(session), batches)
+                elapsed += time.perf_counter() - start
+        database.close()
+    return CITIES * DAYS * ROUNDS / elapsed
+
+
+async def main() -> None:
+    for name, save in (("orm", orm_save), ("bulk", bulk_save)):
+        print(f"{name:>5}: {await rows_per_second(save):10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Initial schema, as created by create_all before the migrations.
+
+Databases created before the migrations are marked with: alembic stamp 0001
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cities",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("city_name", sa.String(250), nullable=False),
+        sa.Column("country", sa.String(250), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("id"),
+        sa.UniqueConstraint("city_name", "country"),
+    )
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("user_name", sa.String(250), nullable=False),
+        sa.Column("timezone", sa.String(250), nullable=False),
+        sa.Column("city_id", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["city_id"], ["cities.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_name"),
+    )
+    op.create_table(
+        "weather_requests",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("date", sa.String(250), nullable=False),
+        sa.Column("weather_conditions", sa.String(250), nullable=False),
+        sa.Column("temperature", sa.Double(), nullable=False),
+        sa.Column("wind_speed", sa.Double(), nullable=False),
+        sa.Column("humidity", sa.Double(), nullable=False),
+        sa.Column("city_id", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["city_id"], ["cities.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "weather_notes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.String(250), nullable=False),
+        sa.Column("note", sa.String(250), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("weather_notes")
+    op.drop_table("weather_requests")
+    op.drop_table("users")
+    op.drop_table("cities")
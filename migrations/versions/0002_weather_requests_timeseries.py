@@ -0,0 +1,206 @@
+"""Store weather_requests.date as a timezone aware timestamp indexed with city_id,
+along with the provider of the forecast and the time it answered.
+
+The text dates are copied to a new column by chunks of BACKFILL_CHUNK rows in id order,
+each chunk in its own short transaction, so the table stays writable meanwhile.
+The rows written during the copy are caught up in the last transaction,
+which swaps the columns. On PostgreSQL the indexes are built concurrently beforehand,
+one of them partial on the rows still missing the copy so the catch up skips the scan.
+Writes wait on a SHARE ROW EXCLUSIVE lock during the catch up and the swap, and the
+NOT NULL is proven by a check constraint validated outside of it, so SET NOT NULL
+does not scan the table under its ACCESS EXCLUSIVE lock.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK = 10000
+INDEX = "ix_weather_requests_city_id_date"
+MISSING_INDEX = "ix_weather_requests_missing_copy"
+NOT_NULL_CHECK = "ck_weather_requests_copy_not_null"
+
+
+def parse_date(value: str) -> datetime:
+    """Text dates were written by str(datetime), the naive ones are UTC."""
+    date = datetime.fromisoformat(value)
+    if date.tzinfo is None:
+        return date.replace(tzinfo=timezone.utc)
+    return date.astimezone(timezone.utc)
+
+
+def format_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return str(value)
+
+
+def copy_chunk(
+    connection: sa.Connection,
+    source: sa.ColumnClause,
+    target: sa.ColumnClause,
+    convert: Callable[[Any], Any],
+    after: Any = None,
+) -> Any:
+    """Copy source to target in the next chunk of rows still missing it,
+    return the last id copied, None once every row is copied."""
+    weather_requests = source.table
+    query = (
+        sa.select(weather_requests.c.id, source)
+        .where(target.is_(None))
+        .order_by(weather_requests.c.id)
+        .limit(BACKFILL_CHUNK)
+    )
+    if after is not None:
+        query = query.where(weather_requests.c.id > after)
+    rows = connection.execute(query).all()
+    if not rows:
+        return None
+    connection.execute(
+        weather_requests.update()
+        .where(weather_requests.c.id == sa.bindparam("row_id"))
+        .values({target.name: sa.bindparam("value")}),
+        [{"row_id": row_id, "value": convert(value)} for row_id, value in rows],
+    )
+    return rows[-1][0]
+
+
+def backfill(
+    source: sa.ColumnClause, target: sa.ColumnClause, convert: Callable[[Any], Any]
+) -> None:
+    """Copy every row, a transaction per chunk on a connection of its own."""
+    engine = op.get_bind().engine
+    last_id = None
+    while True:
+        with engine.begin() as connection:
+            last_id = copy_chunk(connection, source, target, convert, last_id)
+        if last_id is None:
+            return
+
+
+def catch_up(
+    source: sa.ColumnClause, target: sa.ColumnClause, convert: Callable[[Any], Any]
+) -> None:
+    """Copy the rows written since the backfill went past their id, in the migration."""
+    while copy_chunk(op.get_bind(), source, target, convert) is not None:
+        pass
+
+
+def create_missing_index(target: str) -> None:
+    """Partial index of the rows still missing the copy, built without blocking writes."""
+    op.create_index(
+        MISSING_INDEX,
+        "weather_requests",
+        ["id"],
+        postgresql_where=sa.text(f"{target} IS NULL"),
+        postgresql_concurrently=True,
+    )
+
+
+def lock_writes() -> None:
+    """Hold the writes until the migration commits, the reads go on."""
+    op.execute("LOCK TABLE weather_requests IN SHARE ROW EXCLUSIVE MODE")
+
+
+def swap_columns_postgresql(source: str, target: str, column_type: sa.types.TypeEngine) -> None:
+    """Replace source by target, renamed to source, then set it NOT NULL without
+    scanning the table under the ACCESS EXCLUSIVE lock."""
+    op.drop_index(MISSING_INDEX, "weather_requests")
+    op.execute(
+        f"ALTER TABLE weather_requests ADD CONSTRAINT {NOT_NULL_CHECK} "
+        f"CHECK ({target} IS NOT NULL) NOT VALID"
+    )
+    op.drop_column("weather_requests", source)
+    op.alter_column("weather_requests", target, new_column_name=source, existing_type=column_type)
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE weather_requests VALIDATE CONSTRAINT {NOT_NULL_CHECK}")
+    # The valid check constraint proves the column has no null, SET NOT NULL skips the scan.
+    op.alter_column("weather_requests", source, existing_type=column_type, nullable=False)
+    op.drop_constraint(NOT_NULL_CHECK, "weather_requests", type_="check")
+
+
+def upgrade() -> None:
+    if context.is_offline_mode():
+        raise RuntimeError("The backfill of the dates reads the rows, run it online.")
+    op.add_column("weather_requests", sa.Column("date_ts", sa.DateTime(timezone=True)))
+    op.add_column("weather_requests", sa.Column("provider", sa.String(64)))
+    op.add_column("weather_requests", sa.Column("observed_at", sa.DateTime(timezone=True)))
+
+    weather_requests = sa.table(
+        "weather_requests",
+        sa.column("id"),
+        sa.column("date", sa.String(250)),
+        sa.column("date_ts", sa.DateTime(timezone=True)),
+    )
+    text_date, timestamp = weather_requests.c.date, weather_requests.c.date_ts
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        backfill(text_date, timestamp, parse_date)
+        if postgresql:
+            op.create_index(
+                INDEX, "weather_requests", ["city_id", "date_ts"], postgresql_concurrently=True
+            )
+            create_missing_index("date_ts")
+    if postgresql:
+        lock_writes()
+    catch_up(text_date, timestamp, parse_date)
+
+    if postgresql:
+        swap_columns_postgresql("date", "date_ts", sa.DateTime(timezone=True))
+        return
+    with op.batch_alter_table("weather_requests") as batch_op:
+        batch_op.drop_column("date")
+        batch_op.alter_column(
+            "date_ts",
+            new_column_name="date",
+            existing_type=sa.DateTime(timezone=True),
+            nullable=False,
+        )
+    op.create_index(INDEX, "weather_requests", ["city_id", "date"])
+
+
+def downgrade() -> None:
+    if context.is_offline_mode():
+        raise RuntimeError("The backfill of the dates reads the rows, run it online.")
+    op.drop_index(INDEX, "weather_requests")
+    op.add_column("weather_requests", sa.Column("date_text", sa.String(250)))
+
+    weather_requests = sa.table(
+        "weather_requests",
+        sa.column("id"),
+        sa.column("date", sa.DateTime(timezone=True)),
+        sa.column("date_text", sa.String(250)),
+    )
+    timestamp, text_date = weather_requests.c.date, weather_requests.c.date_text
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        backfill(timestamp, text_date, format_date)
+        if postgresql:
+            create_missing_index("date_text")
+    if postgresql:
+        lock_writes()
+    catch_up(timestamp, text_date, format_date)
+
+    if postgresql:
+        op.drop_column("weather_requests", "observed_at")
+        op.drop_column("weather_requests", "provider")
+        swap_columns_postgresql("date", "date_text", sa.String(250))
+        return
+    with op.batch_alter_table("weather_requests") as batch_op:
+        batch_op.drop_column("observed_at")
+        batch_op.drop_column("provider")
+        batch_op.drop_column("date")
+        batch_op.alter_column(
+            "date_text", new_column_name="date", existing_type=sa.String(250), nullable=False
+        )
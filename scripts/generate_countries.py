@@ -0,0 +1,44 @@
+"""Generate weather_api/weather_requests/countries.py from the pycountry ISO 3166-1 database."""
+
+from importlib.metadata import version
+from pathlib import Path
+import json
+
+import pycountry
+
+TARGET = Path(__file__).parents[1] / "weather_api" / "weather_requests" / "countries.py"
+
+HEADER = '''"""ISO 3166-1 alpha-2 codes and country names.
+
+Generated by scripts/generate_countries.py from pycountry {version}, do not edit.
+A plain frozen table is cheap to import in every worker, unlike the pycountry database.
+"""
+
+from types import MappingProxyType
+
+COUNTRY_NAMES = MappingProxyType(
+    {{
+'''
+
+FOOTER = '''    }
+)
+
+
+def country_name(country_code: str) -> str | None:
+    """Name of the country with the alpha-2 code, in any case, None if the code is not valid."""
+    return COUNTRY_NAMES.get(country_code.upper())
+'''
+
+
+def main() -> None:
+    rows = "".join(
+        f"        {json.dumps(country.alpha_2)}: {json.dumps(country.name, ensure_ascii=False)},\n"
+        for country in sorted(pycountry.countries, key=lambda country: country.alpha_2)
+    )
+    TARGET.write_text(
+        HEADER.format(version=version("pycountry")) + rows + FOOTER, encoding="utf-8"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from typing import Iterator
 import datetime
 import os
 
@@ -20,6 +21,7 @@ class DummyDayForecast:
     country: str = "dummy"
     wind_speed: float = 0.0
     humidity: float = 0.0
+    retrieved_at: datetime = None
 
 
 @pytest.fixture(scope="module")
@@ -28,10 +30,11 @@ def dummy_day_forecast():
 
 
 @pytest.fixture(scope="module")
-def test_client() -> TestClient:
+def test_client() -> Iterator[TestClient]:
     app = create_app()
 
-    return TestClient(app)
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,67 @@
+import uuid
+
+from pytest import mark
+
+from weather_api.weather_requests.clients.storage_clients.city_cache import CityIdCache
+from weather_api.weather_requests.clients.storage_clients.storage_clients import (
+    AsyncDBStorageClient,
+)
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+from weather_api.weather_requests.storage_handlers import storage_handler
+from weather_api.weather_requests.weather_db_engine import (
+    AsyncDatabase,
+    async_url,
+    create_schema_async,
+    get_async_engine,
+)
+from weather_api.weather_requests.weather_models import City, WeatherRequest
+
+
+def test_async_url_uses_the_asyncio_drivers():
+    assert async_url("sqlite:///weather.db").drivername == "sqlite+aiosqlite"
+    assert async_url("postgresql://localhost/weather").drivername == "postgresql+asyncpg"
+    assert async_url("sqlite+aiosqlite://").drivername == "sqlite+aiosqlite"
+
+
+@mark.asyncio
+async def test_async_storage_handler_saves_and_reuses_the_city(dummy_day_forecast):
+    engine = get_async_engine("sqlite:///:memory:")
+    await create_schema_async(engine)
+    database = AsyncDatabase.of(engine)
+    forecasts = ForecastBatch.of([dummy_day_forecast])
+
+    async with database.sessions() as session:
+        client = AsyncDBStorageClient(session)
+        await storage_handler(client, forecasts)
+        await storage_handler(client, forecasts)
+
+        cities = await client.read(model=City, filter={"city_name": "dummy"})
+        weather = await client.read(model=WeatherRequest, filter={"city_id": cities[0].id})
+
+    assert len(cities) == 1
+    assert len(weather) == 2
+    await database.close()
+
+
+@mark.asyncio
+async def test_async_save_forecasts_retries_a_deleted_cached_city(dummy_day_forecast):
+    engine = get_async_engine("sqlite:///:memory:")
+    await create_schema_async(engine)
+    database = AsyncDatabase.of(engine)
+    city_ids = CityIdCache()
+    deleted_id = uuid.uuid4()
+    city_ids.set("Deleted city", "dummy", deleted_id)
+    forecasts = ForecastBatch.of([dummy_day_forecast])
+    forecasts.city_name = "Deleted city"
+
+    async with database.sessions() as session:
+        client = AsyncDBStorageClient(session, city_ids)
+        await client.save_forecasts([forecasts])
+
+        cities = await client.read(model=City, filter={"city_name": "Deleted city"})
+        weather = await client.read(model=WeatherRequest, filter={"city_id": cities[0].id})
+
+    assert cities[0].id != deleted_id
+    assert len(weather) == 1
+    assert city_ids.get("Deleted city", "dummy") == cities[0].id
+    await database.close()
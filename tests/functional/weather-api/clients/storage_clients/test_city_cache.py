@@ -0,0 +1,83 @@
+from unittest.mock import patch
+import uuid
+
+from pytest import mark
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from weather_api.weather_requests.clients.storage_clients.city_cache import CityIdCache
+from weather_api.weather_requests.clients.storage_clients.storage_clients import (
+    CSVStorageClient,
+    DBStorageClient,
+)
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+from weather_api.weather_requests.storage_handlers import build_storage_entries
+from weather_api.weather_requests.weather_db_engine import create_schema, get_engine
+from weather_api.weather_requests.weather_models import City
+
+
+def test_city_id_cache_is_bounded():
+    city_ids = CityIdCache(max_entries=2)
+
+    city_ids.set("Rome", "Italy", uuid.uuid4())
+    city_ids.set("Milan", "Italy", str(uuid.uuid4()))
+    city_ids.get("Rome", "Italy")
+    city_ids.set("Turin", "Italy", uuid.uuid4())
+
+    assert len(city_ids) == 2
+    assert city_ids.get("Milan", "Italy") is None
+    assert isinstance(city_ids.get("Rome", "Italy"), uuid.UUID)
+
+
+def test_save_forecasts_skips_the_lookup_of_cached_cities(dummy_day_forecast):
+    engine = get_engine("sqlite:///:memory:")
+    create_schema(engine)
+    city_ids = CityIdCache()
+    forecasts = ForecastBatch.of([dummy_day_forecast])
+
+    with Session(engine) as session:
+        client = DBStorageClient(session, city_ids)
+        client.save_forecasts([forecasts])
+        with patch(
+            "weather_api.weather_requests.clients.storage_clients.storage_clients.city_upsert"
+        ) as city_upsert:
+            client.save_forecasts([forecasts])
+
+    city_upsert.assert_not_called()
+    assert city_ids.get("dummy", "dummy") is not None
+
+
+def test_city_id_cache_drops_deleted_cities(dummy_day_forecast):
+    engine = get_engine("sqlite:///:memory:")
+    create_schema(engine)
+    city_ids = CityIdCache()
+    city_ids.invalidate_on_delete()
+    city = City(id=uuid.uuid4(), city_name="Deleted", country="Italy")
+
+    with Session(engine) as session:
+        client = DBStorageClient(session, city_ids)
+        client.save([city])
+        assert city_ids.get("Deleted", "Italy") == city.id
+        session.delete(city)
+        session.commit()
+        assert city_ids.get("Deleted", "Italy") is None
+
+        client.save_forecasts([ForecastBatch.of([dummy_day_forecast])])
+        session.execute(delete(City))
+        session.commit()
+
+    assert len(city_ids) == 0
+
+
+@mark.asyncio
+async def test_csv_entries_reuse_the_cached_city(dummy_day_forecast, tmp_path):
+    city_ids = CityIdCache()
+    city_id = uuid.uuid4()
+    city_ids.set("dummy", "dummy", city_id)
+    client = CSVStorageClient(str(tmp_path), city_ids)
+
+    with patch.object(client, "read") as read:
+        entries = await build_storage_entries(client, ForecastBatch.of([dummy_day_forecast]))
+
+    read.assert_not_called()
+    assert entries[0].city.id == city_id
@@ -108,6 +108,8 @@ def test_csvstorageclient_save_and_read(
         "temperature": "0.0",
         "wind_speed": "0.0",
         "humidity": "0.0",
+        "provider": "",
+        "observed_at": "",
         "city_id": "",
     }
 
@@ -1,13 +1,18 @@
 import datetime
 import uuid
 
+from sqlalchemy.orm import Session
+
+from weather_api.weather_requests.clients.storage_clients.city_cache import CityIdCache
 from weather_api.weather_requests.clients.storage_clients.storage_clients import DBStorageClient
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+from weather_api.weather_requests.weather_db_engine import create_schema, get_engine
 from weather_api.weather_requests.weather_models import City, WeatherRequest
 
 
 def test_dbstorageclient_save(override_get_engine):
     engine = override_get_engine
-    client = DBStorageClient(engine)
+    client = DBStorageClient(Session(engine))
     entry = [
         City(
             id=uuid.UUID("00000000-0000-0000-0000-000000000000"),
@@ -24,7 +29,7 @@ def test_dbstorageclient_save(override_get_engine):
 
 def test_dbstorageclient_read(override_get_engine):
     engine = override_get_engine
-    client = DBStorageClient(engine)
+    client = DBStorageClient(Session(engine))
     city = client.read(model=City, filter={"city_name": "Very_beautiful_city", "country": "WW"})
     weather_to_save = WeatherRequest(
         id=uuid.UUID("00000000-0000-0000-0000-000000000000"),
@@ -46,3 +51,58 @@ def test_dbstorageclient_read(override_get_engine):
     )
 
     assert result2[0] == weather_to_save
+
+
+def test_dbstorageclient_save_forecasts_upserts_cities(override_get_engine, dummy_day_forecast):
+    forecasts = ForecastBatch.of([dummy_day_forecast, dummy_day_forecast])
+    forecasts.city_name = "Upserted city"
+    first = DBStorageClient(Session(override_get_engine))
+    racing = DBStorageClient(Session(override_get_engine))
+
+    first.save_forecasts([forecasts])
+    racing.save_forecasts([forecasts, forecasts])
+
+    cities = first.read(model=City, filter={"city_name": "Upserted city"})
+    weather = first.read(model=WeatherRequest, filter={"city_id": cities[0].id})
+    assert len(cities) == 1
+    assert len(weather) == 6
+
+
+def test_dbstorageclient_save_forecasts_stores_utc_timestamps(
+    override_get_engine, dummy_day_forecast
+):
+    retrieved_at = datetime.datetime(2023, 12, 4, 8, 30, tzinfo=datetime.timezone.utc)
+    forecasts = ForecastBatch.of([dummy_day_forecast])
+    forecasts.city_name = "Timestamped city"
+    forecasts.provider = "OpenWeatherMapClient"
+    forecasts.retrieved_at = retrieved_at
+    client = DBStorageClient(Session(override_get_engine))
+
+    client.save_forecasts([forecasts])
+
+    city = client.read(model=City, filter={"city_name": "Timestamped city"})
+    weather = client.read(model=WeatherRequest, filter={"city_id": city[0].id})
+    assert weather[0].date == dummy_day_forecast.date
+    assert weather[0].date.tzinfo == datetime.timezone.utc
+    assert weather[0].provider == "OpenWeatherMapClient"
+    assert weather[0].observed_at == retrieved_at
+
+
+def test_dbstorageclient_save_forecasts_retries_a_deleted_cached_city(dummy_day_forecast):
+    engine = get_engine("sqlite:///:memory:")
+    create_schema(engine)
+    city_ids = CityIdCache()
+    deleted_id = uuid.uuid4()
+    city_ids.set("Deleted city", "dummy", deleted_id)
+    forecasts = ForecastBatch.of([dummy_day_forecast])
+    forecasts.city_name = "Deleted city"
+
+    with Session(engine) as session:
+        DBStorageClient(session, city_ids).save_forecasts([forecasts])
+
+        city = session.query(City).filter_by(city_name="Deleted city").one()
+        weather = session.query(WeatherRequest).all()
+    assert city.id != deleted_id
+    assert [row.city_id for row in weather] == [city.id]
+    assert city_ids.get("Deleted city", "dummy") == city.id
+    engine.dispose()
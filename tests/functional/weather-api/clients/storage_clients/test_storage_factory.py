@@ -1,11 +1,13 @@
-from unittest.mock import patch
-
-from pytest import raises
+from pytest import mark, raises
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from weather_api.weather_requests.clients.storage_clients.storage_factory import (
+    AsyncDBStorageClient,
     DBStorageClient,
     get_storage_client,
 )
+from weather_api.weather_requests.weather_db_engine import get_async_engine
 
 
 def test_storage_client_factory_raises_with_invalid_provider():
@@ -13,9 +15,24 @@ def test_storage_client_factory_raises_with_invalid_provider():
         get_storage_client("non_existant_storage_type")
 
 
-@patch("weather_api.weather_requests.weather_db_engine.get_engine")
-def test_storage_client_factory(engine, override_get_engine):
-    engine.return_value = override_get_engine
-    client = get_storage_client("database")
+def test_storage_client_factory(override_get_engine):
+    with Session(override_get_engine) as session:
+        client = get_storage_client("database", session)
 
     assert isinstance(client, DBStorageClient)
+    assert client.session is session
+
+
+def test_storage_client_factory_needs_a_session():
+    with raises(ValueError, match="database_url"):
+        get_storage_client("database")
+
+
+@mark.asyncio
+async def test_storage_client_factory_async_database():
+    engine = get_async_engine("sqlite:///:memory:")
+    async with AsyncSession(engine) as session:
+        client = get_storage_client("async_database", async_session=session)
+
+    assert isinstance(client, AsyncDBStorageClient)
+    await engine.dispose()
@@ -1,10 +1,24 @@
-from pytest import mark
+from unittest.mock import patch
+
+from pytest import mark, raises
+import httpx
 import responses
 
 from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    BadApiException,
     CallEndpointMixin,
+    DayForecast,
+    ForecastBatch,
     ForecastClientConfig,
 )
+from weather_api.weather_requests.clients.weather_clients.http_transport import (
+    get_async_http_client,
+)
+
+
+class EndpointClient(CallEndpointMixin):
+    def parse_weather_response(self, response, parameters):
+        return self.decode_json(response)
 
 
 @mark.parametrize(
@@ -45,7 +59,7 @@ def test_call_endpoint_nonexistent_apikey(endpoint, parameters, expected_result)
     )
 
     config = ForecastClientConfig("0000000")
-    client = CallEndpointMixin(config)
+    client = EndpointClient(config)
 
     response = client.call_endpoint(endpoint, parameters)
     assert response.json()["cod"] == "401"
@@ -84,8 +98,95 @@ def test_call_endpoint_nonexistent_city(endpoint, parameters, expected_result):
     )
 
     config = ForecastClientConfig("123abc")
-    client = CallEndpointMixin(config)
+    client = EndpointClient(config)
 
     response = client.call_endpoint(endpoint, parameters)
     assert response.json()["cod"] == "404"
     assert response.json()["message"] == expected_result
+
+
+@mark.asyncio
+async def test_call_endpoint_async_reuses_pooled_client():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404, json={"cod": "404", "message": "city not found"})
+
+    pooled_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    config = ForecastClientConfig("123abc")
+    client = EndpointClient(config)
+
+    with patch(
+        "weather_api.weather_requests.clients.weather_clients.base_weather_client.get_async_http_client",
+        return_value=pooled_client,
+    ) as get_pooled_client:
+        await client.call_endpoint_async(
+            "https://api.openweathermap.org/data/2.5/weather", {"q": "non_existant"}
+        )
+        response = await client.call_endpoint_async(
+            "https://api.openweathermap.org/data/2.5/forecast/daily", {"q": "non_existant"}
+        )
+
+    assert response.json()["message"] == "city not found"
+    assert get_pooled_client.call_count == 2
+    assert pooled_client.is_closed is False
+    await pooled_client.aclose()
+
+
+@mark.asyncio
+async def test_call_endpoint_async_wraps_transport_errors():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectTimeout("timed out", request=request)
+
+    pooled_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = EndpointClient(ForecastClientConfig("123abc"))
+
+    with patch(
+        "weather_api.weather_requests.clients.weather_clients.base_weather_client.get_async_http_client",
+        return_value=pooled_client,
+    ):
+        with raises(BadApiException, match="Provider unreachable"):
+            await client.call_endpoint_async(
+                "https://api.openweathermap.org/data/2.5/weather", {"q": "city"}
+            )
+    await pooled_client.aclose()
+
+
+def test_call_endpoint_mixin_without_parser_cannot_be_built():
+    class NoParserClient(CallEndpointMixin):
+        pass
+
+    with raises(TypeError, match="parse_weather_response"):
+        NoParserClient(ForecastClientConfig("123abc"))
+
+
+def test_get_async_http_client_is_shared_per_origin():
+    timeout = httpx.Timeout(1.0)
+
+    first = get_async_http_client("https://api.openweathermap.org/data/2.5/weather", timeout)
+    second = get_async_http_client("https://api.openweathermap.org/data/2.5/forecast", timeout)
+    other = get_async_http_client("http://api.weatherapi.com/v1/current.json", timeout)
+
+    assert first is second
+    assert first is not other
+
+
+def test_forecast_batch_slices_columns_and_builds_day_forecasts(dummy_day_forecast):
+    forecasts = [
+        DayForecast(
+            date=dummy_day_forecast.date,
+            temperature=float(day),
+            weather_conditions=dummy_day_forecast.weather_conditions,
+            city_name=dummy_day_forecast.city_name,
+            country=dummy_day_forecast.country,
+            wind_speed=dummy_day_forecast.wind_speed,
+            humidity=dummy_day_forecast.humidity,
+        )
+        for day in range(5)
+    ]
+
+    batch = ForecastBatch.of(forecasts)
+
+    assert batch[:2].temperatures == [0.0, 1.0]
+    assert list(batch) == forecasts
+    assert batch[3] == forecasts[3]
+    assert batch.rows()[4]["temperature"] == 4.0
+    assert not hasattr(forecasts[0], "__dict__")
@@ -0,0 +1,152 @@
+from unittest.mock import patch
+import asyncio
+
+from pytest import mark, raises
+import httpx
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    CircuitOpenException,
+    ForecastClientConfig,
+    RateLimitException,
+)
+from weather_api.weather_requests.clients.weather_clients.circuit_breaker import (
+    CircuitBreaker,
+    CircuitState,
+)
+from weather_api.weather_requests.clients.weather_clients.openweathermap_client import (
+    OpenWeatherMapClient,
+)
+from weather_api.weather_requests.clients.weather_clients.rate_limiter import (
+    RateLimiter,
+    SharedTokenBucket,
+)
+from weather_api.weather_requests.clients.weather_clients.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_circuit_breaker_opens_and_recovers_through_half_open_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=0.5, min_calls=4, reset_timeout=30, clock=clock)
+
+    for success in (True, False, True, False):
+        breaker.record(success)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow_request() is False
+
+    clock.now = 31
+    assert breaker.allow_request() is True
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() is False
+
+    breaker.record(True)
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_circuit_breaker_counts_slow_calls_as_failures():
+    breaker = CircuitBreaker(min_calls=2, slow_call_duration=1)
+
+    breaker.record(True, duration=2)
+    breaker.record(True, duration=3)
+
+    assert breaker.state == CircuitState.OPEN
+
+
+@mark.asyncio
+async def test_cancelled_half_open_probe_lets_the_next_call_probe():
+    started = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        started.set()
+        await asyncio.sleep(10)
+        return httpx.Response(200, json={})
+
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=30, clock=clock)
+    breaker.record(False)
+    clock.now = 31
+    client = OpenWeatherMapClient(ForecastClientConfig("123abc", circuit_breaker=breaker))
+    weather_url, parameters = client.current_weather_request("Padova", "IT")
+
+    pooled_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch(
+        "weather_api.weather_requests.clients.weather_clients.base_weather_client.get_async_http_client",
+        return_value=pooled_client,
+    ):
+        assert breaker.allow_request() is True
+        probe = asyncio.create_task(client.call_endpoint_async(weather_url, parameters))
+        await started.wait()
+        probe.cancel()
+        with raises(asyncio.CancelledError):
+            await probe
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() is True
+    await pooled_client.aclose()
+
+
+@mark.asyncio
+async def test_open_circuit_serves_expired_cache_then_fails_fast():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503, json={"cod": "503", "message": "down"})
+
+    clock = FakeClock()
+    cache = ResponseCache(ttls={"current": 10}, clock=clock)
+    breaker = CircuitBreaker(min_calls=1)
+    client = OpenWeatherMapClient(
+        ForecastClientConfig("123abc", response_cache=cache, circuit_breaker=breaker)
+    )
+    weather_url, parameters = client.current_weather_request("Padova", "IT")
+    cache.set(client.response_cache_key(weather_url, parameters), {"cached": True}, "current", 1)
+    clock.now = 20
+
+    pooled_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch(
+        "weather_api.weather_requests.clients.weather_clients.base_weather_client.get_async_http_client",
+        return_value=pooled_client,
+    ):
+        await client.get_weather_dictionary_async(weather_url, parameters)
+        assert breaker.state == CircuitState.OPEN
+
+        fallback = await client.get_weather_dictionary_async(weather_url, parameters)
+        with raises(CircuitOpenException):
+            await client.get_weather_dictionary_async(f"{weather_url}/other", parameters)
+
+    assert fallback == {"cached": True}
+    assert calls == 1
+    await pooled_client.aclose()
+
+
+@mark.asyncio
+async def test_open_circuit_spends_no_rate_limit_token(tmp_path):
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=30, clock=clock)
+    breaker.record(False)
+    bucket = SharedTokenBucket(str(tmp_path / "limits.db"), "openweathermap", per_minute=1)
+    client = OpenWeatherMapClient(
+        ForecastClientConfig(
+            "123abc", circuit_breaker=breaker, rate_limiter=RateLimiter(bucket, max_wait=0)
+        )
+    )
+    weather_url, parameters = client.current_weather_request("Padova", "IT")
+
+    with raises(CircuitOpenException):
+        await client.get_weather_dictionary_async(weather_url, parameters)
+    assert bucket.remaining()["minute"] == 1
+
+    bucket.try_acquire()
+    clock.now = 31
+    with raises(RateLimitException):
+        await client.get_weather_dictionary_async(weather_url, parameters)
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() is True
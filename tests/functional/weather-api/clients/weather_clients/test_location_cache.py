@@ -0,0 +1,125 @@
+from unittest.mock import patch
+import threading
+
+from pytest import mark
+import httpx
+import responses
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    ForecastClientConfig,
+)
+from weather_api.weather_requests.clients.weather_clients.location_cache import (
+    LocationCache,
+    ResolvedLocation,
+)
+from weather_api.weather_requests.clients.weather_clients.response_cache import ResponseCache
+from weather_api.weather_requests.clients.weather_clients.weatherapi_client import WeatherAPIClient
+
+PADOVA = ResolvedLocation("Padova", "Italy", 45.42, 11.88, "Europe/Rome")
+
+
+def test_location_cache_keeps_the_most_recent_locations_in_memory():
+    location_cache = LocationCache(max_entries=2)
+    location_cache.set("Padova", "IT", PADOVA)
+    location_cache.set("Vicenza", "IT", PADOVA)
+    location_cache.cached("Padova", "IT")
+    location_cache.set("Verona", "IT", PADOVA)
+
+    assert location_cache.cached("Padova", "IT") == PADOVA
+    assert location_cache.cached("Vicenza", "IT") is None
+    assert len(location_cache._locations) == 2
+
+
+def test_location_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "locations.db")
+    LocationCache(path).set("Padova", "IT", PADOVA)
+
+    assert LocationCache(path).get("  padova ", "it") == PADOVA
+    assert LocationCache().get("Padova", "IT") is None
+
+
+@responses.activate
+def test_resolved_location_is_queried_by_coordinates():
+    responses.add(
+        responses.GET,
+        "http://api.weatherapi.com/v1/current.json",
+        json={
+            "location": {
+                "name": "Padova",
+                "country": "Italy",
+                "lat": 45.42,
+                "lon": 11.88,
+                "tz_id": "Europe/Rome",
+                "localtime_epoch": 1701644400,
+            },
+            "current": {
+                "temp_c": 3.5,
+                "condition": {"text": "Sunny"},
+                "wind_kph": 1.2,
+                "humidity": 80,
+            },
+        },
+    )
+    location_cache = LocationCache()
+    client = WeatherAPIClient(
+        ForecastClientConfig(
+            "123abc",
+            response_cache=ResponseCache(ttls={"current": 600}),
+            location_cache=location_cache,
+        )
+    )
+
+    client.get_current_weather("Padova", "IT")
+    client.get_current_weather("padova", "it")
+
+    assert location_cache.get("PADOVA", "IT") == PADOVA
+    assert responses.calls[0].request.params["q"] == "Padova,IT"
+    assert responses.calls[1].request.params["q"] == "45.42,11.88"
+    assert len(responses.calls) == 2
+    assert client.get_current_weather("Padova ", "IT")[0].city_name == "Padova"
+    assert len(responses.calls) == 2
+
+
+@mark.asyncio
+async def test_async_calls_read_and_write_locations_off_the_event_loop(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json={
+                "location": {
+                    "name": "Padova",
+                    "country": "Italy",
+                    "lat": 45.42,
+                    "lon": 11.88,
+                    "tz_id": "Europe/Rome",
+                    "localtime_epoch": 1701644400,
+                },
+                "current": {
+                    "temp_c": 3.5,
+                    "condition": {"text": "Sunny"},
+                    "wind_kph": 1.2,
+                    "humidity": 80,
+                },
+            },
+        )
+
+    location_cache = LocationCache(str(tmp_path / "locations.db"))
+    client = WeatherAPIClient(ForecastClientConfig("123abc", location_cache=location_cache))
+    threads = []
+    connection = location_cache.connection
+
+    def record_thread():
+        threads.append(threading.get_ident())
+        return connection()
+
+    pooled_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch.object(location_cache, "connection", record_thread), patch(
+        "weather_api.weather_requests.clients.weather_clients.base_weather_client.get_async_http_client",
+        return_value=pooled_client,
+    ):
+        await client.get_current_weather_async("Padova", "IT")
+
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+    assert LocationCache(location_cache.path).get("Padova", "IT") == PADOVA
+    await pooled_client.aclose()
@@ -0,0 +1,86 @@
+import asyncio
+
+from pytest import mark, raises
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    BadApiException,
+    BaseWeatherClient,
+)
+from weather_api.weather_requests.clients.weather_clients.provider_chain import HedgedWeatherClient
+from weather_api.weather_requests.clients.weather_clients.provider_registry import ProviderRegistry
+
+
+class FakeClient(BaseWeatherClient):
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.cancelled = False
+
+    @property
+    def provider_name(self):
+        return self.name
+
+    def get_current_weather(self, city, country_code):
+        if self.error:
+            raise self.error
+        return [self.name]
+
+    def get_long_weather_forecast(self, city, country_code, days=10):
+        return self.get_current_weather(city, country_code)
+
+    async def get_current_weather_async(self, city, country_code):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return [self.name]
+
+    async def get_long_weather_forecast_async(self, city, country_code, days=10):
+        return await self.get_current_weather_async(city, country_code)
+
+
+@mark.asyncio
+async def test_hedged_client_returns_primary_when_fast():
+    client = HedgedWeatherClient([FakeClient("primary"), FakeClient("secondary")])
+
+    assert await client.get_current_weather_async("Padova", "IT") == ["primary"]
+
+
+@mark.asyncio
+async def test_hedged_client_fires_secondary_after_budget_and_cancels_loser():
+    primary = FakeClient("slow-primary", delay=1)
+    client = HedgedWeatherClient([primary, FakeClient("secondary")], hedge_delay=0.01)
+
+    result = await client.get_current_weather_async("Padova", "IT")
+    await asyncio.sleep(0)
+
+    assert result == ["secondary"]
+    assert primary.cancelled is True
+
+
+@mark.asyncio
+async def test_hedged_client_fails_over_on_error_and_raises_when_all_fail():
+    failing = FakeClient("failing", error=BadApiException("down"))
+    client = HedgedWeatherClient([failing, FakeClient("secondary")], hedge_delay=10)
+
+    assert await client.get_long_weather_forecast_async("Padova", "IT", 3) == ["secondary"]
+    with raises(BadApiException):
+        await HedgedWeatherClient([failing, failing]).get_current_weather_async("Padova", "IT")
+
+
+def test_hedged_client_sync_failover():
+    failing = FakeClient("failing", error=BadApiException("down"))
+
+    assert HedgedWeatherClient([failing, FakeClient("b")]).get_current_weather("x", "IT") == ["b"]
+
+
+def test_weather_client_chain_without_fallback_is_single_client():
+    registry = ProviderRegistry.build()
+    client = registry.chain("weatherapi", ["weatherapi"])
+
+    assert not isinstance(client, HedgedWeatherClient)
+    assert isinstance(registry.chain("weatherapi", ["openweathermap"]), HedgedWeatherClient)
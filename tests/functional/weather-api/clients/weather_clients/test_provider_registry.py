@@ -0,0 +1,35 @@
+from pytest import mark, raises
+
+from weather_api.weather_requests.clients.weather_clients import http_transport
+from weather_api.weather_requests.clients.weather_clients.provider_chain import HedgedWeatherClient
+from weather_api.weather_requests.clients.weather_clients.provider_registry import ProviderRegistry
+
+
+def test_provider_registry_reuses_clients_and_chains():
+    registry = ProviderRegistry.build()
+
+    chain = registry.chain("openweathermap", ["weatherapi", "openweathermap"], 0.5)
+
+    assert isinstance(chain, HedgedWeatherClient)
+    assert chain.clients == [registry.get("openweathermap"), registry.get("weatherapi")]
+    assert registry.chain("openweathermap", ["weatherapi"], 0.5) is chain
+    assert registry.chain("weatherapi") is registry.get("weatherapi")
+
+
+def test_provider_registry_rejects_unknown_providers():
+    registry = ProviderRegistry.build()
+
+    with raises(ValueError, match="non_existant_provider is not a valid provider."):
+        registry.chain("weatherapi", ["non_existant_provider"])
+
+
+@mark.asyncio
+async def test_provider_registry_closes_pooled_sessions():
+    registry = ProviderRegistry.build()
+    session = http_transport.get_http_session("https://api.openweathermap.org/data/2.5/weather")
+
+    assert http_transport.get_http_session("https://api.openweathermap.org/data/2.5/") is session
+    await registry.aclose()
+    assert (
+        http_transport.get_http_session("https://api.openweathermap.org/data/2.5/") is not session
+    )
@@ -0,0 +1,36 @@
+import math
+
+from pytest import mark
+
+from weather_api.weather_requests.clients.weather_clients.rate_limiter import (
+    RateLimiter,
+    SharedTokenBucket,
+)
+
+
+def test_token_bucket_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first_worker = SharedTokenBucket(path, "weatherapi", per_minute=60, burst=2)
+    second_worker = SharedTokenBucket(path, "weatherapi", per_minute=60, burst=2)
+
+    assert first_worker.try_acquire() == 0
+    assert second_worker.try_acquire() == 0
+    assert 0 < first_worker.try_acquire() <= 1
+    assert second_worker.remaining()["minute"] == 0
+
+
+def test_token_bucket_enforces_daily_quota(tmp_path):
+    bucket = SharedTokenBucket(str(tmp_path / "limits.db"), "owm", per_minute=600, per_day=1)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == math.inf
+    assert bucket.remaining()["day"] == 0
+
+
+@mark.asyncio
+async def test_rate_limiter_queues_briefly_then_gives_up(tmp_path):
+    bucket = SharedTokenBucket(str(tmp_path / "limits.db"), "owm", per_minute=600, burst=1)
+
+    assert await RateLimiter(bucket, max_wait=1).acquire() is True
+    assert await RateLimiter(bucket, max_wait=1).acquire() is True
+    assert await RateLimiter(bucket, max_wait=0).acquire() is False
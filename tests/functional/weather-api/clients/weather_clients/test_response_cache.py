@@ -0,0 +1,104 @@
+import responses
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    ForecastClientConfig,
+)
+from weather_api.weather_requests.clients.weather_clients.openweathermap_client import (
+    OpenWeatherMapClient,
+)
+from weather_api.weather_requests.clients.weather_clients.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_response_cache_expires_by_kind():
+    clock = FakeClock()
+    cache = ResponseCache(ttls={"current": 10, "forecast": 100}, clock=clock)
+
+    cache.set("now", {"temp": 1}, "current", 10)
+    cache.set("forecast", {"temp": 2}, "forecast", 10)
+    clock.now = 50
+
+    assert cache.get("now") is None
+    assert cache.get("forecast") == {"temp": 2}
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.expirations == 1
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(ttls={"current": 10}, max_entries=2, max_bytes=25)
+
+    cache.set("a", 1, "current", 10)
+    cache.set("b", 2, "current", 10)
+    cache.get("a")
+    cache.set("c", 3, "current", 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.evictions == 1
+    assert cache.current_bytes == 20
+
+
+@responses.activate
+def test_client_serves_repeated_requests_from_cache():
+    responses.add(
+        responses.GET,
+        "https://api.openweathermap.org/data/2.5//weather",
+        json={
+            "dt": 1701644400,
+            "timezone": 3600,
+            "name": "Camposampiero",
+            "sys": {"country": "IT"},
+            "weather": [{"description": "clear sky"}],
+            "main": {"temp": 3.5, "humidity": 80},
+            "wind": {"speed": 1.2},
+        },
+    )
+    cache = ResponseCache(ttls={"current": 600, "forecast": 600})
+    client = OpenWeatherMapClient(ForecastClientConfig("123abc", response_cache=cache))
+
+    first = client.get_current_weather("Camposampiero", "IT")
+    second = client.get_current_weather("camposampiero", "it")
+
+    assert first == second
+    assert len(responses.calls) == 1
+    assert cache.stats.hits == 1
+
+
+@responses.activate
+def test_shorter_forecasts_are_sliced_from_one_cached_response():
+    responses.add(
+        responses.GET,
+        "https://api.openweathermap.org/data/2.5//forecast/daily",
+        json={
+            "city": {"timezone": 3600, "name": "Camposampiero", "country": "IT"},
+            "list": [
+                {
+                    "dt": 1701644400 + day * 86400,
+                    "temp": {"day": 3.5},
+                    "weather": [{"description": "clear sky"}],
+                    "speed": 1.2,
+                    "humidity": 80,
+                }
+                for day in range(16)
+            ],
+        },
+    )
+    cache = ResponseCache(ttls={"current": 600, "forecast": 600})
+    client = OpenWeatherMapClient(ForecastClientConfig("123abc", response_cache=cache))
+
+    three_days = client.get_long_weather_forecast("Camposampiero", "IT", 3)
+    ten_days = client.get_long_weather_forecast("Camposampiero", "IT", 10)
+
+    assert len(three_days) == 3
+    assert len(ten_days) == 10
+    assert len(responses.calls) == 1
+    assert responses.calls[0].request.params["cnt"] == "16"
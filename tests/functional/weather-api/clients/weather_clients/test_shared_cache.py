@@ -0,0 +1,83 @@
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+
+from pytest import mark
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    DayForecast,
+    ForecastBatch,
+)
+from weather_api.weather_requests.clients.weather_clients.shared_cache import (
+    SharedCacheWeatherClient,
+    SharedForecastCache,
+)
+
+
+def make_forecast(dummy_day_forecast) -> DayForecast:
+    return DayForecast(
+        date=dummy_day_forecast.date,
+        temperature=dummy_day_forecast.temperature,
+        weather_conditions=dummy_day_forecast.weather_conditions,
+        city_name=dummy_day_forecast.city_name,
+        country=dummy_day_forecast.country,
+        wind_speed=dummy_day_forecast.wind_speed,
+        humidity=dummy_day_forecast.humidity,
+    )
+
+
+def test_shared_cache_is_visible_from_another_connection(dummy_day_forecast, tmp_path):
+    path = str(tmp_path / "cache.db")
+    forecasts = ForecastBatch.of([make_forecast(dummy_day_forecast)])
+
+    SharedForecastCache(path, ttls={"current": 600}).set("key", forecasts, "current")
+    other_worker_cache = SharedForecastCache(path, ttls={"current": 600})
+
+    assert other_worker_cache.get("key") == forecasts
+    assert other_worker_cache.get("missing") is None
+
+
+def test_shared_cache_skips_kinds_without_ttl(dummy_day_forecast, tmp_path):
+    cache = SharedForecastCache(str(tmp_path / "cache.db"), ttls={"current": 0})
+
+    cache.set("key", ForecastBatch.of([make_forecast(dummy_day_forecast)]), "current")
+
+    assert cache.get("key") is None
+
+
+@mark.asyncio
+async def test_shared_cache_client_calls_provider_once(dummy_day_forecast, tmp_path):
+    forecasts = ForecastBatch.of([make_forecast(dummy_day_forecast)])
+    provider_client = MagicMock()
+    provider_client.get_current_weather_async = AsyncMock(return_value=forecasts)
+    cache = SharedForecastCache(str(tmp_path / "cache.db"), ttls={"current": 600})
+    client = SharedCacheWeatherClient(provider_client, cache, "weatherapi")
+
+    first = await client.get_current_weather_async("Padova", "IT")
+    second = await client.get_current_weather_async("padova", "IT")
+
+    assert first == second == forecasts
+    provider_client.get_current_weather_async.assert_awaited_once_with("Padova", "IT")
+
+
+@mark.asyncio
+async def test_shared_cache_client_serves_stale_and_refreshes(dummy_day_forecast, tmp_path):
+    stale = ForecastBatch.of([make_forecast(dummy_day_forecast)])
+    fresh = ForecastBatch.of([make_forecast(dummy_day_forecast)])
+    fresh.temperatures[0] = 12.0
+    provider_client = MagicMock()
+    provider_client.get_long_weather_forecast_async = AsyncMock(return_value=fresh)
+    provider_client.max_forecast_days = 14
+    cache = SharedForecastCache(
+        str(tmp_path / "cache.db"), ttls={"forecast": 600}, stale_grace=3600
+    )
+    client = SharedCacheWeatherClient(provider_client, cache, "weatherapi")
+    key = client.cache_key("forecast", "Padova", "IT")
+    cache.set(key, stale, "forecast")
+    cache.connection().execute("UPDATE forecasts SET expires_at = expires_at - 1200")
+
+    served = await client.get_long_weather_forecast_async("Padova", "IT", 3)
+    await asyncio.sleep(0.05)
+
+    assert served == stale
+    provider_client.get_long_weather_forecast_async.assert_awaited_once_with("Padova", "IT", 14)
+    assert cache.get(key) == fresh
@@ -0,0 +1,70 @@
+from pytest import raises
+import responses
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    BadApiException,
+    ForecastClientConfig,
+)
+from weather_api.weather_requests.clients.weather_clients.response_cache import ResponseCache
+from weather_api.weather_requests.clients.weather_clients.weatherapi_client import WeatherAPIClient
+
+
+def forecast_day(day: int) -> dict:
+    return {
+        "date_epoch": 1701648000 + day * 86400,
+        "day": {
+            "avgtemp_c": 4.0 + day,
+            "maxwind_kph": 12.5,
+            "avgvis_km": 10.0,
+            "avghumidity": 70,
+            "condition": {"text": "Sunny"},
+        },
+        "hour": [{"time_epoch": 1701648000 + hour * 3600, "temp_c": 3.0} for hour in range(24)],
+    }
+
+
+@responses.activate
+def test_forecast_keeps_only_the_fields_day_forecast_needs():
+    responses.add(
+        responses.GET,
+        "http://api.weatherapi.com/v1/forecast.json",
+        json={
+            "location": {
+                "name": "Padova",
+                "country": "Italy",
+                "lat": 45.42,
+                "lon": 11.88,
+                "tz_id": "Europe/Rome",
+                "localtime_epoch": 1701644400,
+            },
+            "current": {"temp_c": 3.5},
+            "forecast": {"forecastday": [forecast_day(day) for day in range(14)]},
+        },
+    )
+    cache = ResponseCache(ttls={"forecast": 600})
+    client = WeatherAPIClient(ForecastClientConfig("123abc", response_cache=cache))
+
+    forecasts = client.get_long_weather_forecast("Padova", "IT", 3)
+    weather_url, parameters = client.long_forecast_request("Padova", "IT")
+    cached = cache.get(client.response_cache_key(weather_url, parameters))
+
+    assert [forecast.temperature for forecast in forecasts] == [4.0, 5.0, 6.0]
+    assert forecasts[0].wind_speed == 12.5
+    assert forecasts[0].date.date().isoformat() == "2023-12-04"
+    assert forecasts[0].city_name == "Padova"
+    assert len(cached["days"]) == 14
+    assert "hour" not in cached["days"][0]
+
+
+@responses.activate
+def test_invalid_api_key_is_an_api_error():
+    responses.add(
+        responses.GET,
+        "http://api.weatherapi.com/v1/current.json",
+        json={"error": {"code": 2006, "message": "API key is invalid."}},
+        status=401,
+    )
+    client = WeatherAPIClient(ForecastClientConfig("0000000"))
+
+    with raises(BadApiException, match="API key is invalid"):
+        client.get_current_weather("Padova", "IT")
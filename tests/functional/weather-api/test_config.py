@@ -0,0 +1,100 @@
+import os
+
+from pydantic import ValidationError
+from pytest import raises
+
+from weather_api.config import ConfigStore, read_config
+from weather_api.config_schema import ConfigValidationSchema
+
+# config.yml as it was before the optional keys were added
+BASELINE_CONFIG = """\
+service: "weather-api"
+host: "0.0.0.0"
+port: "8080"
+openweather_api_key: "API_KEY_OPENWEATHER"
+weather_api_com_key: "API_KEY_WEATHERAPI"
+weather_now_provider: "openweathermap"
+weather_forecast_provider: "weatherapi"
+storage_type: "database"
+database_url: "sqlite:///weatherclient.db"
+local_directory_for_csv: "local_path"
+weather_records_file_name: "weather_records.csv"
+cities_file_name: "cities_records.csv"
+"""
+
+
+def write_config(path, service: str) -> None:
+    with open("config.test.yml") as config_file:
+        content = config_file.read()
+    path.write_text(content.replace('service: "weather-api"', f'service: "{service}"'))
+
+
+def test_read_config_applies_the_defaults_of_missing_optional_keys(tmp_path):
+    config_file = tmp_path / "config.yml"
+    config_file.write_text(BASELINE_CONFIG)
+
+    config = read_config(str(config_file))
+
+    assert config.directory_path == "local_path"
+    assert config.read_timeout == ConfigValidationSchema.model_fields["read_timeout"].default
+    assert config.rate_limits == {}
+    assert config.write_behind is False
+
+
+def test_read_config_reads_the_optional_keys(tmp_path):
+    config_file = tmp_path / "config.yml"
+    config_file.write_text(BASELINE_CONFIG + "read_timeout: 4.5\nwrite_behind: true\n")
+
+    config = read_config(str(config_file))
+
+    assert config.read_timeout == 4.5
+    assert config.write_behind is True
+
+
+def test_config_store_shares_a_frozen_snapshot(tmp_path, monkeypatch):
+    config_file = tmp_path / "config.yml"
+    write_config(config_file, "first")
+    monkeypatch.setenv("CONFIG_FILE", str(config_file))
+    store = ConfigStore()
+
+    snapshot = store.get()
+
+    assert store.get() is snapshot
+    with raises(ValidationError):
+        snapshot.service = "changed"
+
+
+def test_config_store_reloads_a_changed_file(tmp_path, monkeypatch):
+    config_file = tmp_path / "config.yml"
+    write_config(config_file, "first")
+    monkeypatch.setenv("CONFIG_FILE", str(config_file))
+    store = ConfigStore()
+    first = store.get()
+
+    write_config(config_file, "second")
+    os.utime(config_file, (0, 0))
+
+    assert store.get() is first
+    monkeypatch.setattr(store, "_checked_at", 0.0)
+    assert store.get().service == "second"
+    write_config(config_file, "third")
+    assert store.reload().service == "third"
+
+
+def test_config_store_keeps_the_last_valid_snapshot(tmp_path, monkeypatch):
+    config_file = tmp_path / "config.yml"
+    write_config(config_file, "first")
+    monkeypatch.setenv("CONFIG_FILE", str(config_file))
+    store = ConfigStore()
+    first = store.get()
+
+    config_file.write_text('service: "half written\nhost: [')
+    os.utime(config_file, (0, 0))
+    monkeypatch.setattr(store, "_checked_at", 0.0)
+
+    assert store.get() is first
+    assert store.reload() is first
+    config_file.write_text("service: missing keys")
+    assert store.reload() is first
+    write_config(config_file, "second")
+    assert store.reload().service == "second"
@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+import sqlite3
+import uuid
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from weather_api.weather_requests.weather_db_engine import get_engine
+from weather_api.weather_requests.weather_models import City, WeatherRequest
+
+
+def alembic_config(database_url: str) -> Config:
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", database_url)
+    return config
+
+
+def test_migrations_backfill_text_dates_to_utc_timestamps(tmp_path):
+    database_path = tmp_path / "weather.db"
+    config = alembic_config(f"sqlite:///{database_path}")
+    command.upgrade(config, "0001")
+    city_id = uuid.uuid4().hex
+    with sqlite3.connect(database_path) as connection:
+        connection.execute("INSERT INTO cities VALUES (?, 'Rome', 'Italy')", (city_id,))
+        for date in ("2023-12-04 00:00:00+01:00", "2023-12-05 12:00:00"):
+            connection.execute(
+                "INSERT INTO weather_requests VALUES (?, ?, 'Sunny', 1.0, 2.0, 3.0, ?)",
+                (uuid.uuid4().hex, date, city_id),
+            )
+
+    command.upgrade(config, "head")
+
+    engine = get_engine(f"sqlite:///{database_path}")
+    with Session(engine) as session:
+        dates = session.scalars(select(WeatherRequest.date).order_by(WeatherRequest.date)).all()
+    engine.dispose()
+    assert dates == [
+        datetime(2023, 12, 3, 23, tzinfo=timezone.utc),
+        datetime(2023, 12, 5, 12, tzinfo=timezone.utc),
+    ]
+
+
+def test_migrations_downgrade_restores_text_dates(tmp_path):
+    database_path = tmp_path / "weather.db"
+    config = alembic_config(f"sqlite:///{database_path}")
+    command.upgrade(config, "head")
+    engine = get_engine(f"sqlite:///{database_path}")
+    city = City(id=uuid.uuid4(), city_name="Rome", country="Italy")
+    with Session(engine) as session:
+        session.add(city)
+        session.flush()
+        session.execute(
+            WeatherRequest.__table__.insert(),  # type: ignore[attr-defined]
+            {
+                "id": uuid.uuid4(),
+                "date": datetime(2023, 12, 4, tzinfo=timezone.utc),
+                "weather_conditions": "Sunny",
+                "temperature": 1.0,
+                "wind_speed": 2.0,
+                "humidity": 3.0,
+                "city_id": city.id,
+            },
+        )
+        session.commit()
+    engine.dispose()
+
+    command.downgrade(config, "0001")
+
+    with sqlite3.connect(database_path) as connection:
+        dates = connection.execute("SELECT date FROM weather_requests").fetchall()
+    assert dates == [("2023-12-04 00:00:00+00:00",)]
@@ -0,0 +1,13 @@
+import pycountry
+
+from weather_api.weather_requests.countries import COUNTRY_NAMES, country_name
+
+
+def test_country_table_matches_pycountry():
+    assert COUNTRY_NAMES == {country.alpha_2: country.name for country in pycountry.countries}
+
+
+def test_country_name_ignores_case_and_rejects_unknown_codes():
+    assert country_name("it") == "Italy"
+    assert country_name("XX") is None
+    assert country_name("ITA") is None
@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+import io
+
+from pytest import importorskip, mark, raises
+import msgpack
+import orjson
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+from weather_api.weather_requests.response_formats import (
+    ARROW,
+    JSON,
+    MSGPACK,
+    NDJSON,
+    NotAcceptable,
+    arrow_stream,
+    encode_forecasts,
+    negotiate,
+)
+from weather_api.weather_requests.serialization import dump_rows
+
+
+def make_batch() -> ForecastBatch:
+    return ForecastBatch(
+        city_name="Padova",
+        country="Italy",
+        dates=[
+            datetime(2023, 12, 4, tzinfo=timezone.utc),
+            datetime(2023, 12, 5, tzinfo=timezone.utc),
+        ],
+        temperatures=[3, 4.5],
+        weather_conditions=["Sunny", "Cloudy"],
+        wind_speeds=[1.2, 3],
+        humidities=[80, 70.5],
+    )
+
+
+@mark.parametrize(
+    "accept, expected",
+    [
+        (None, JSON),
+        ("*/*", JSON),
+        ("application/x-ndjson", NDJSON),
+        ("application/x-msgpack", MSGPACK),
+        ("application/json;q=0.5, application/msgpack", MSGPACK),
+        ("text/html, application/*;q=0.1", JSON),
+    ],
+)
+def test_negotiate_picks_the_preferred_supported_media_type(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def test_negotiate_rejects_unsupported_media_types():
+    with raises(NotAcceptable):
+        negotiate("text/html, application/json;q=0")
+
+
+def test_ndjson_and_msgpack_carry_the_json_rows():
+    batch = make_batch()
+    rows = orjson.loads(dump_rows(batch))
+
+    lines = encode_forecasts(batch, NDJSON).splitlines()
+
+    assert [orjson.loads(line) for line in lines] == rows
+    assert msgpack.unpackb(encode_forecasts(batch, MSGPACK)) == rows
+
+
+def test_arrow_stream_has_typed_columns():
+    pyarrow = importorskip("pyarrow")
+
+    table = pyarrow.ipc.open_stream(io.BytesIO(encode_forecasts(make_batch(), ARROW))).read_all()
+
+    assert table.schema.field("date").type == pyarrow.timestamp("us", tz="UTC")
+    assert table.column("temperature").to_pylist() == [3.0, 4.5]
+    assert table.column("country").to_pylist() == ["Italy", "Italy"]
+
+
+def test_arrow_stream_consumes_the_batches_one_at_a_time():
+    importorskip("pyarrow")
+    consumed = []
+
+    def batches():
+        for city in ("Padova", "Roma", "Milano"):
+            consumed.append(city)
+            yield make_batch(), None
+
+    stream = arrow_stream(batches())
+    next(stream)
+
+    assert consumed == ["Padova"]
+    next(stream)
+    assert consumed == ["Padova", "Roma"]
@@ -1,37 +1,44 @@
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 
+from pytest import mark
+import msgpack
+import orjson
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    BadCityException,
+    ForecastBatch,
+)
 from weather_api.weather_requests.schemas import WeatherResponseSchema
 
 
-@patch("weather_api.weather_requests.weather_db_engine.get_engine")
 @patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
 def test_weather_now_returns_correct_response(
     dummy_weather_handler,
-    engine,
     dummy_day_forecast,
     test_client,
-    override_get_engine,
 ):
     city_name = "who cares"
     country_code = "IT"
 
-    dummy_weather_handler.return_value = [
-        WeatherResponseSchema(
-            date=dummy_day_forecast.date,
-            weather_conditions=dummy_day_forecast.weather_conditions,
-            temperature=dummy_day_forecast.temperature,
-            wind_speed=dummy_day_forecast.wind_speed,
-            humidity=dummy_day_forecast.humidity,
-            city_name=dummy_day_forecast.city_name,
-            country=dummy_day_forecast.country,
-        )
-    ]
-
-    engine.return_value = override_get_engine
+    dummy_weather_handler.return_value = ForecastBatch.of(
+        [
+            WeatherResponseSchema(
+                date=dummy_day_forecast.date,
+                weather_conditions=dummy_day_forecast.weather_conditions,
+                temperature=dummy_day_forecast.temperature,
+                wind_speed=dummy_day_forecast.wind_speed,
+                humidity=dummy_day_forecast.humidity,
+                city_name=dummy_day_forecast.city_name,
+                country=dummy_day_forecast.country,
+            )
+        ]
+    )
 
     response = test_client.get(f"/weather-now/{country_code}/{city_name}")
 
     assert response.status_code == 200
+    assert response.headers["Age"] == "0"
     assert response.json() == [
         {
             "date": "2023-12-04T00:00:00+01:00",
@@ -45,39 +52,37 @@ def test_weather_now_returns_correct_response(
     ]
 
 
-@patch("weather_api.weather_requests.weather_db_engine.get_engine")
 @patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
 def test_weatherforecast_returns_correct_response(
     dummy_weather_handler,
-    engine,
     dummy_day_forecast,
     test_client,
-    override_get_engine,
 ):
     city_name = "who cares"
     country_code = "IT"
 
-    dummy_weather_handler.return_value = [
-        WeatherResponseSchema(
-            date=dummy_day_forecast.date,
-            weather_conditions=dummy_day_forecast.weather_conditions,
-            temperature=dummy_day_forecast.temperature,
-            wind_speed=dummy_day_forecast.wind_speed,
-            humidity=dummy_day_forecast.humidity,
-            city_name=dummy_day_forecast.city_name,
-            country=dummy_day_forecast.country,
-        ),
-        WeatherResponseSchema(
-            date=dummy_day_forecast.date,
-            weather_conditions=dummy_day_forecast.weather_conditions,
-            temperature=dummy_day_forecast.temperature,
-            wind_speed=dummy_day_forecast.wind_speed,
-            humidity=dummy_day_forecast.humidity,
-            city_name=dummy_day_forecast.city_name,
-            country=dummy_day_forecast.country,
-        ),
-    ]
-    engine.return_value = override_get_engine
+    dummy_weather_handler.return_value = ForecastBatch.of(
+        [
+            WeatherResponseSchema(
+                date=dummy_day_forecast.date,
+                weather_conditions=dummy_day_forecast.weather_conditions,
+                temperature=dummy_day_forecast.temperature,
+                wind_speed=dummy_day_forecast.wind_speed,
+                humidity=dummy_day_forecast.humidity,
+                city_name=dummy_day_forecast.city_name,
+                country=dummy_day_forecast.country,
+            ),
+            WeatherResponseSchema(
+                date=dummy_day_forecast.date,
+                weather_conditions=dummy_day_forecast.weather_conditions,
+                temperature=dummy_day_forecast.temperature,
+                wind_speed=dummy_day_forecast.wind_speed,
+                humidity=dummy_day_forecast.humidity,
+                city_name=dummy_day_forecast.city_name,
+                country=dummy_day_forecast.country,
+            ),
+        ]
+    )
 
     response = test_client.get(f"/weather-forecast/{country_code}/{city_name}")
 
@@ -102,3 +107,173 @@ def test_weatherforecast_returns_correct_response(
             "country": "dummy",
         },
     ]
+
+
+@patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
+def test_weather_now_batch_reports_errors_per_city(
+    dummy_weather_handler,
+    dummy_day_forecast,
+    test_client,
+):
+    forecast = WeatherResponseSchema(
+        date=dummy_day_forecast.date,
+        weather_conditions=dummy_day_forecast.weather_conditions,
+        temperature=dummy_day_forecast.temperature,
+        wind_speed=dummy_day_forecast.wind_speed,
+        humidity=dummy_day_forecast.humidity,
+        city_name=dummy_day_forecast.city_name,
+        country=dummy_day_forecast.country,
+    )
+
+    async def handler(client, city_name, country_code, days):
+        if city_name == "nowhere":
+            raise BadCityException("nowhere,IT does not match any location.")
+        return ForecastBatch.of([forecast])
+
+    dummy_weather_handler.side_effect = handler
+
+    response = test_client.post(
+        "/weather-now/batch",
+        json=[
+            {"country_code": "IT", "city_name": "dummy"},
+            {"country_code": "IT", "city_name": "nowhere"},
+        ],
+    )
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "country_code": "IT",
+            "city_name": "dummy",
+            "status_code": 200,
+            "forecasts": [
+                {
+                    "date": "2023-12-04T00:00:00+01:00",
+                    "weather_conditions": "dummy",
+                    "temperature": 0.0,
+                    "wind_speed": 0.0,
+                    "humidity": 0.0,
+                    "city_name": "dummy",
+                    "country": "dummy",
+                }
+            ],
+            "error": None,
+        },
+        {
+            "country_code": "IT",
+            "city_name": "nowhere",
+            "status_code": 404,
+            "forecasts": [],
+            "error": "nowhere,IT does not match any location.",
+        },
+    ]
+
+
+@patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
+def test_weather_now_revalidates_with_etag(
+    dummy_weather_handler,
+    dummy_day_forecast,
+    test_client,
+):
+    forecasts = ForecastBatch.of([dummy_day_forecast])
+    forecasts.retrieved_at = datetime.now(timezone.utc) - timedelta(seconds=60)
+    dummy_weather_handler.return_value = forecasts
+
+    response = test_client.get("/weather-now/IT/dummy")
+    etag = response.headers["ETag"]
+    revalidated = test_client.get("/weather-now/IT/dummy", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=600"
+    assert 60 <= int(response.headers["Age"]) < 70
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["ETag"] == etag
+
+
+@patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
+def test_weather_now_negotiates_msgpack(
+    dummy_weather_handler,
+    dummy_day_forecast,
+    test_client,
+):
+    dummy_weather_handler.return_value = ForecastBatch.of([dummy_day_forecast])
+
+    response = test_client.get("/weather-now/IT/dummy", headers={"Accept": "application/msgpack"})
+    refused = test_client.get("/weather-now/IT/dummy", headers={"Accept": "text/html"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/msgpack"
+    assert response.headers["Vary"] == "Accept"
+    assert msgpack.unpackb(response.content)[0]["date"] == "2023-12-04T00:00:00+01:00"
+    assert refused.status_code == 406
+
+
+@patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
+def test_weather_now_batch_streams_ndjson(dummy_weather_handler, dummy_day_forecast, test_client):
+    async def handler(client, city_name, country_code, days):
+        if city_name == "nowhere":
+            raise BadCityException("nowhere,IT does not match any location.")
+        return ForecastBatch.of([dummy_day_forecast])
+
+    dummy_weather_handler.side_effect = handler
+
+    response = test_client.post(
+        "/weather-now/batch",
+        json=[
+            {"country_code": "IT", "city_name": "dummy"},
+            {"country_code": "IT", "city_name": "nowhere"},
+        ],
+        headers={"Accept": "application/x-ndjson"},
+    )
+    lines = [orjson.loads(line) for line in response.content.splitlines()]
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert [line["status_code"] for line in lines] == [200, 404]
+    assert lines[0]["forecasts"][0]["temperature"] == 0.0
+    assert lines[1]["error"] == "nowhere,IT does not match any location."
+
+
+@mark.parametrize("days", [-3, 0, 17])
+@patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
+def test_weather_forecast_rejects_days_out_of_bounds(dummy_weather_handler, days, test_client):
+    response = test_client.get(f"/weather-forecast/IT/dummy?days={days}")
+    batch_response = test_client.post(
+        f"/weather-forecast/batch?days={days}",
+        json=[{"country_code": "IT", "city_name": "dummy"}],
+    )
+
+    assert response.status_code == 422
+    assert batch_response.status_code == 422
+    dummy_weather_handler.assert_not_called()
+
+
+@mark.parametrize("days", [1, 14])
+@patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
+def test_weather_forecast_accepts_days_within_bounds(
+    dummy_weather_handler, days, dummy_day_forecast, test_client
+):
+    dummy_weather_handler.return_value = ForecastBatch.of([dummy_day_forecast])
+
+    response = test_client.get(f"/weather-forecast/IT/dummy?days={days}")
+
+    assert response.status_code == 200
+    assert dummy_weather_handler.call_args.args[-1] == days
+
+
+@mark.parametrize("days", [15, 16])
+@patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
+def test_weather_forecast_rejects_days_beyond_the_provider_chain(
+    dummy_weather_handler, days, test_client
+):
+    response = test_client.get(f"/weather-forecast/IT/dummy?days={days}")
+    batch_response = test_client.post(
+        f"/weather-forecast/batch?days={days}",
+        json=[{"country_code": "IT", "city_name": "dummy"}],
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "At most 14 days of forecast can be requested."
+    assert batch_response.status_code == 422
+    dummy_weather_handler.assert_not_called()
@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+import orjson
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+from weather_api.weather_requests.schemas import WeatherResponseSchema
+from weather_api.weather_requests.serialization import SerializedForecasts, dump_rows
+
+
+def make_batch(dummy_day_forecast, retrieved_at=None) -> ForecastBatch:
+    return ForecastBatch(
+        city_name="Padova",
+        country="Italy",
+        dates=[dummy_day_forecast.date, datetime(2023, 12, 5, tzinfo=timezone.utc)],
+        temperatures=[3, 4.5],
+        weather_conditions=["Sunny", "Cloudy"],
+        wind_speeds=[1.2, 3],
+        humidities=[80, 70.5],
+        retrieved_at=retrieved_at,
+    )
+
+
+def test_dump_rows_matches_response_schema(dummy_day_forecast):
+    batch = make_batch(dummy_day_forecast)
+
+    expected = [WeatherResponseSchema(**row).model_dump(mode="json") for row in batch.rows()]
+
+    assert orjson.loads(dump_rows(batch)) == expected
+    assert b'"temperature":3.0' in dump_rows(batch)
+
+
+def test_serialized_forecasts_reuses_bytes_of_the_same_answer(dummy_day_forecast):
+    serialized = SerializedForecasts(max_entries=1)
+    retrieved_at = datetime.now(timezone.utc)
+
+    first = serialized.dumps(make_batch(dummy_day_forecast, retrieved_at))
+    second = serialized.dumps(make_batch(dummy_day_forecast, retrieved_at))
+    serialized.dumps(make_batch(dummy_day_forecast))
+
+    assert first is second
+    assert len(serialized) == 1
+
+
+def test_openapi_still_documents_the_response_schema(test_client):
+    schema = test_client.get("/openapi.json").json()
+    response = schema["paths"]["/weather-now/{country_code}/{city_name}"]["get"]["responses"]
+
+    assert response["200"]["content"]["application/json"]["schema"]["items"] == {
+        "$ref": "#/components/schemas/WeatherResponseSchema"
+    }
@@ -1,46 +1,43 @@
 from unittest.mock import patch
 
-from pytest import raises
+from pytest import mark, raises
+from sqlalchemy.orm import Session
 
 from weather_api.weather_requests.clients.storage_clients.storage_clients import DBStorageClient
 from weather_api.weather_requests.clients.weather_clients import openweathermap_client
-from weather_api.weather_requests.schemas import WeatherResponseSchema
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+from weather_api.weather_requests.schemas import CityRequestSchema, WeatherResponseSchema
 from weather_api.weather_requests.service_handler import (
     NonexistentCountry,
+    batch_request_helper,
     get_request_helper,
     weather_endpoint_handler,
 )
+from weather_api.weather_requests.weather_models import City
 
 
+@mark.asyncio
 @patch(
-    "weather_api.weather_requests.clients.weather_clients.openweathermap_client.OpenWeatherMapClient.get_current_weather"
+    "weather_api.weather_requests.clients.weather_clients.openweathermap_client.OpenWeatherMapClient.get_current_weather_async"
 )
-def test_weather_service_handler(dummy_onedayforecast_client, dummy_day_forecast):
+async def test_weather_service_handler(dummy_onedayforecast_client, dummy_day_forecast):
     city_name = "who cares"
     country_code = "PT"
 
     dummy_onedayforecast_client.return_value = [dummy_day_forecast]
 
-    response = weather_endpoint_handler(
+    response = await weather_endpoint_handler(
         client=openweathermap_client.OpenWeatherMapClient,
         city_name=city_name,
         country_code=country_code,
     )
 
-    assert [
-        WeatherResponseSchema(
-            date=dummy_day_forecast.date,
-            weather_conditions=dummy_day_forecast.weather_conditions,
-            temperature=dummy_day_forecast.temperature,
-            wind_speed=dummy_day_forecast.wind_speed,
-            humidity=dummy_day_forecast.humidity,
-            city_name=dummy_day_forecast.city_name,
-            country=dummy_day_forecast.country,
-        )
-    ] == response
+    assert ForecastBatch.of([dummy_day_forecast]) == response
+    assert list(response)[0].city_name == dummy_day_forecast.city_name
 
 
-def test_service_handler_with_nonexistant_country():
+@mark.asyncio
+async def test_service_handler_with_nonexistant_country():
     city_name = "who cares"
     country_code = "Nope"
     client = "not_important"
@@ -48,16 +45,21 @@ def test_service_handler_with_nonexistant_country():
     expected_result = NonexistentCountry
 
     with raises(NonexistentCountry) as err:
-        weather_endpoint_handler(client=client, city_name=city_name, country_code=country_code)
+        await weather_endpoint_handler(
+            client=client, city_name=city_name, country_code=country_code
+        )
     assert err.type == expected_result
 
 
+@mark.asyncio
 @patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
-def test_get_request_helper_return(dummy_weather_handler, override_get_engine, dummy_day_forecast):
+async def test_get_request_helper_return(
+    dummy_weather_handler, override_get_engine, dummy_day_forecast
+):
     city_name = "who cares"
     country_code = "IT"
     weather_client = "not important"
-    storage_client = DBStorageClient(override_get_engine)
+    storage_client = DBStorageClient(Session(override_get_engine))
 
     dummy_weather_handler.return_value = [
         WeatherResponseSchema(
@@ -71,7 +73,7 @@ def test_get_request_helper_return(dummy_weather_handler, override_get_engine, d
         )
     ]
 
-    response = get_request_helper(weather_client, city_name, country_code, storage_client)
+    response = await get_request_helper(weather_client, city_name, country_code, storage_client)
 
     expected_result = [
         WeatherResponseSchema(
@@ -86,3 +88,68 @@ def test_get_request_helper_return(dummy_weather_handler, override_get_engine, d
     ]
 
     assert response == expected_result
+
+
+@mark.asyncio
+@patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
+async def test_batch_request_helper_saves_once(
+    dummy_weather_handler, override_get_engine, dummy_day_forecast
+):
+    forecast = WeatherResponseSchema(
+        date=dummy_day_forecast.date,
+        weather_conditions=dummy_day_forecast.weather_conditions,
+        temperature=dummy_day_forecast.temperature,
+        wind_speed=dummy_day_forecast.wind_speed,
+        humidity=dummy_day_forecast.humidity,
+        city_name="Batch city",
+        country="Batch country",
+    )
+    dummy_weather_handler.return_value = ForecastBatch.of([forecast])
+    storage_client = DBStorageClient(Session(override_get_engine))
+    cities = [
+        CityRequestSchema(country_code="IT", city_name="Batch city"),
+        CityRequestSchema(country_code="IT", city_name="batch city"),
+    ]
+
+    with patch.object(
+        storage_client, "save_forecasts", wraps=storage_client.save_forecasts
+    ) as save_forecasts:
+        response = await batch_request_helper("not important", cities, storage_client)
+
+    assert [item.status_code for item in response] == [200, 200]
+    save_forecasts.assert_called_once()
+    assert len(storage_client.read(model=City, filter={"city_name": "Batch city"})) == 1
+
+
+@mark.asyncio
+@patch("weather_api.weather_requests.service_handler.weather_endpoint_handler")
+async def test_batch_request_helper_isolates_unexpected_errors(
+    dummy_weather_handler, override_get_engine, dummy_day_forecast
+):
+    forecast = WeatherResponseSchema(
+        date=dummy_day_forecast.date,
+        weather_conditions=dummy_day_forecast.weather_conditions,
+        temperature=dummy_day_forecast.temperature,
+        wind_speed=dummy_day_forecast.wind_speed,
+        humidity=dummy_day_forecast.humidity,
+        city_name="Batch city",
+        country="Batch country",
+    )
+
+    async def city_weather(client, city_name, country_code, days):
+        if city_name == "Broken":
+            raise KeyError("location")
+        return ForecastBatch.of([forecast])
+
+    dummy_weather_handler.side_effect = city_weather
+    storage_client = DBStorageClient(Session(override_get_engine))
+    cities = [
+        CityRequestSchema(country_code="IT", city_name="Broken"),
+        CityRequestSchema(country_code="IT", city_name="Batch city"),
+    ]
+
+    response = await batch_request_helper("not important", cities, storage_client)
+
+    assert [item.status_code for item in response] == [500, 200]
+    assert "location" in response[0].error
+    assert len(response[1].forecasts) == 1
@@ -0,0 +1,43 @@
+import asyncio
+
+from pytest import mark, raises
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    BadCityException,
+)
+from weather_api.weather_requests.single_flight import SingleFlight
+
+
+@mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    calls = 0
+
+    async def call_provider():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ["forecast"]
+
+    results = await asyncio.gather(*(flights.do("padova", call_provider) for _ in range(10)))
+
+    assert calls == 1
+    assert results == [["forecast"]] * 10
+    assert len(flights) == 0
+
+
+@mark.asyncio
+async def test_single_flight_propagates_errors_to_every_caller():
+    flights = SingleFlight()
+
+    async def call_provider():
+        await asyncio.sleep(0.01)
+        raise BadCityException("nowhere does not match any location.")
+
+    results = await asyncio.gather(
+        *(flights.do("nowhere", call_provider) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, BadCityException) for result in results)
+    with raises(BadCityException):
+        await flights.do("nowhere", call_provider)
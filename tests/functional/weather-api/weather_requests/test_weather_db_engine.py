@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+from sqlalchemy import QueuePool, StaticPool, inspect
+
+from weather_api.weather_requests.weather_db_engine import (
+    Database,
+    create_schema,
+    get_engine,
+    get_session,
+)
+
+
+def test_get_engine_pools_file_databases(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path / 'weather.db'}", pool_size=3, max_overflow=1)
+
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 3
+    assert engine.echo is False
+    engine.dispose()
+
+
+def test_get_session_closes_the_request_session():
+    engine = get_engine("sqlite:///:memory:")
+    create_schema(engine)
+    database = Database.of(engine)
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(database=database)))
+
+    sessions = get_session(request)
+    session = next(sessions)
+    session.connection()
+    sessions.close()
+
+    assert isinstance(engine.pool, StaticPool)
+    assert "cities" in inspect(engine).get_table_names()
+    assert not session.in_transaction()
+    database.close()
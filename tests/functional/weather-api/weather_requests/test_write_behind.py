@@ -0,0 +1,99 @@
+from unittest.mock import patch
+import threading
+
+from pytest import mark
+from sqlalchemy import func, select
+
+from weather_api.weather_requests.clients.storage_clients.storage_clients import DBStorageClient
+from weather_api.weather_requests.clients.storage_clients.storage_factory import (
+    open_storage_client,
+)
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+from weather_api.weather_requests.weather_db_engine import Database, create_schema, get_engine
+from weather_api.weather_requests.weather_models import WeatherRequest
+from weather_api.weather_requests.write_behind import WriteBehindQueue
+
+
+def make_queue(database: Database, **options) -> WriteBehindQueue:
+    return WriteBehindQueue(lambda: open_storage_client("database", database), **options)
+
+
+def stored_rows(database: Database) -> int:
+    with database.sessions() as session:
+        return session.scalar(select(func.count()).select_from(WeatherRequest))
+
+
+@mark.asyncio
+async def test_write_behind_saves_batches_in_one_transaction(dummy_day_forecast):
+    engine = get_engine("sqlite:///:memory:")
+    create_schema(engine)
+    database = Database.of(engine)
+    queue = make_queue(database, batch_size=3, flush_interval=60)
+    queue.start()
+
+    forecasts = ForecastBatch.of([dummy_day_forecast])
+    await queue.submit(forecasts, forecasts)
+    await queue.submit(forecasts)
+    await queue.close()
+
+    assert stored_rows(database) == 3
+    assert queue.stats.enqueued == 3
+    assert queue.stats.written == 3
+    assert queue.stats.flushes == 1
+    database.close()
+
+
+@mark.asyncio
+async def test_write_behind_saves_inline_when_full(dummy_day_forecast):
+    engine = get_engine("sqlite:///:memory:")
+    create_schema(engine)
+    database = Database.of(engine)
+    queue = make_queue(database, max_size=1)
+
+    forecasts = ForecastBatch.of([dummy_day_forecast])
+    await queue.submit(forecasts, forecasts)
+
+    assert len(queue) == 1
+    assert queue.stats.overflowed == 1
+    assert stored_rows(database) == 1
+    queue.start()
+    await queue.close()
+    assert stored_rows(database) == 2
+    database.close()
+
+
+@mark.asyncio
+async def test_write_behind_counts_failed_flushes(dummy_day_forecast):
+    database = Database.of(get_engine("sqlite:///:memory:"))
+    queue = make_queue(database)
+
+    with patch(
+        "weather_api.weather_requests.write_behind.batch_storage_handler",
+        side_effect=RuntimeError("database is locked"),
+    ):
+        await queue.write([ForecastBatch.of([dummy_day_forecast])])
+
+    assert queue.stats.failed == 1
+    assert queue.stats.written == 0
+    database.close()
+
+
+@mark.asyncio
+async def test_write_behind_saves_sync_storage_off_the_event_loop(dummy_day_forecast):
+    engine = get_engine("sqlite:///:memory:")
+    create_schema(engine)
+    database = Database.of(engine)
+    queue = make_queue(database)
+    threads = []
+    save_forecasts = DBStorageClient.save_forecasts
+
+    def record_thread(client, batches):
+        threads.append(threading.get_ident())
+        save_forecasts(client, batches)
+
+    with patch.object(DBStorageClient, "save_forecasts", record_thread):
+        await queue.write([ForecastBatch.of([dummy_day_forecast])])
+
+    assert threads and threads[0] != threading.get_ident()
+    assert stored_rows(database) == 1
+    database.close()
@@ -1,18 +1,113 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import asyncio
 import os
 import shutil
+import signal
 
 from fastapi import FastAPI
 from loguru import logger
 
-from weather_api.config import load_config
+from weather_api.config import load_config, reload_config
 from weather_api.routes import api_router
+from weather_api.weather_requests.clients.storage_clients.storage_factory import (
+    StorageType,
+    open_storage_client,
+    warm_city_id_cache,
+)
+from weather_api.weather_requests.clients.weather_clients.provider_registry import ProviderRegistry
+from weather_api.weather_requests.weather_db_engine import (
+    AsyncDatabase,
+    Database,
+    create_schema,
+    create_schema_async,
+    get_async_engine,
+    get_engine,
+)
+from weather_api.weather_requests.write_behind import WriteBehindQueue
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Open the resources shared by the requests of this worker, close them at shutdown."""
+    listen_for_reload()
+    app.state.database = open_database()
+    app.state.async_database = await open_async_database()
+    await warm_city_id_cache(app.state.database, app.state.async_database)
+    app.state.weather_clients = ProviderRegistry.build()
+    app.state.write_behind = open_write_behind(app)
+    yield
+    if app.state.write_behind is not None:
+        await app.state.write_behind.close()
+    if app.state.database is not None:
+        app.state.database.close()
+    if app.state.async_database is not None:
+        await app.state.async_database.close()
+    await app.state.weather_clients.aclose()
+
+
+def database_options() -> dict:
+    app_config = load_config()
+    return {
+        "pool_size": app_config.database_pool_size,
+        "max_overflow": app_config.database_max_overflow,
+        "pool_timeout": app_config.database_pool_timeout,
+        "echo": app_config.database_echo,
+    }
+
+
+def open_database() -> Database | None:
+    """Create the engine, its pool and the sessionmaker shared by every request."""
+    app_config = load_config()
+    if not app_config.database_url or app_config.storage_type != StorageType.DATABASE:
+        return None
+    engine = get_engine(app_config.database_url, **database_options())
+    if app_config.database_create_schema:
+        create_schema(engine)
+    return Database.of(engine)
+
+
+async def open_async_database() -> AsyncDatabase | None:
+    """Same as open_database with the asyncio driver, for the async_database storage."""
+    app_config = load_config()
+    if not app_config.database_url or app_config.storage_type != StorageType.ASYNC_DATABASE:
+        return None
+    engine = get_async_engine(app_config.database_url, **database_options())
+    if app_config.database_create_schema:
+        await create_schema_async(engine)
+    return AsyncDatabase.of(engine)
+
+
+def open_write_behind(app: FastAPI) -> WriteBehindQueue | None:
+    """Start the queue saving forecasts in the background, on the databases of the app."""
+    app_config = load_config()
+    if not app_config.write_behind:
+        return None
+    queue = WriteBehindQueue(
+        lambda: open_storage_client(
+            StorageType(load_config().storage_type), app.state.database, app.state.async_database
+        ),
+        max_size=app_config.write_behind_max_queue,
+        batch_size=app_config.write_behind_batch_size,
+        flush_interval=app_config.write_behind_flush_interval,
+    )
+    queue.start()
+    return queue
+
+
+def listen_for_reload() -> None:
+    """Reload the config of this worker on SIGHUP, where the platform has it."""
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_config)
+    except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+        logger.warning("Config reload on SIGHUP is not available.")
 
 
 def create_app() -> FastAPI:
-    configuration = load_config()
-    app = FastAPI(title=configuration.service, docs_url=None, redoc_url=None)
+    app_config = load_config()
+    app = FastAPI(title=app_config.service, docs_url=None, redoc_url=None, lifespan=lifespan)
     app.include_router(api_router)
-    logger.info("Started %s %s", configuration.service)
+    logger.info("Started %s %s", app_config.service)
     return app
 
 
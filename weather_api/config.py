@@ -1,20 +1,33 @@
 """Config file to load yaml file and return it as a dict."""
 import os
+import threading
+import time
 
 from dotenv import find_dotenv, load_dotenv
+from loguru import logger
+from pydantic import ValidationError
 import yaml
 
 from weather_api.config_schema import ConfigValidationSchema
 
 load_dotenv(find_dotenv())
 
+# Keys with a default in the schema, a config file without them keeps working.
+OPTIONAL_KEYS = frozenset(
+    name for name, field in ConfigValidationSchema.model_fields.items() if not field.is_required()
+) - {"database_url"}
 
-def load_config() -> ConfigValidationSchema:
-    """Load config yaml file and returns it as a dict."""
+
+def config_file_path() -> str:
     yaml_config_file = os.getenv("CONFIG_FILE")
     if not yaml_config_file:
         raise TypeError("CONFIG FILE env variable is not set.")
-    with open(yaml_config_file) as config_file:
+    return yaml_config_file
+
+
+def read_config(yaml_config_file: str) -> ConfigValidationSchema:
+    """Parse and validate the config yaml file."""
+    with open(yaml_config_file, encoding="utf-8") as config_file:
         config_load = yaml.safe_load(config_file)
     config = ConfigValidationSchema(
         service=config_load["service"],
@@ -29,5 +42,71 @@ def load_config() -> ConfigValidationSchema:
         directory_path=config_load["local_directory_for_csv"],
         weather_records_file_name=config_load["weather_records_file_name"],
         cities_file_name=config_load["cities_file_name"],
+        **{key: value for key, value in config_load.items() if key in OPTIONAL_KEYS},
     )
     return config
+
+
+class ConfigStore:
+    """Holds the frozen config snapshot shared by every module of the process.
+
+    The file is parsed once, then its mtime is looked at most every
+    config_reload_interval seconds and a changed file replaces the snapshot.
+    Readers always get a whole snapshot, a reload swaps it in a single assignment.
+    A file that does not parse or validate, half written for example,
+    is logged and the last valid snapshot is kept.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: ConfigValidationSchema | None = None
+        self._path: str | None = None
+        self._mtime: float | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> ConfigValidationSchema:
+        snapshot = self._snapshot
+        if snapshot is None or self._path != os.getenv("CONFIG_FILE"):
+            return self.reload()
+        interval = snapshot.config_reload_interval
+        if interval and time.monotonic() - self._checked_at >= interval:
+            self._checked_at = time.monotonic()
+            if self._file_mtime() != self._mtime:
+                return self.reload()
+        return snapshot
+
+    def reload(self) -> ConfigValidationSchema:
+        """Parse the file again and swap the snapshot, if the file is valid."""
+        with self._lock:
+            path = config_file_path()
+            try:
+                mtime = os.stat(path).st_mtime
+                snapshot = read_config(path)
+            except (OSError, yaml.YAMLError, KeyError, TypeError, ValidationError) as e:
+                if self._snapshot is None or self._path != path:
+                    raise
+                logger.error("Invalid config {}, keeping the last valid one: {!r}", path, e)
+                self._mtime, self._checked_at = self._file_mtime(), time.monotonic()
+                return self._snapshot
+            self._path, self._mtime, self._checked_at = path, mtime, time.monotonic()
+            self._snapshot = snapshot
+        return snapshot
+
+    def _file_mtime(self) -> float | None:
+        try:
+            return os.stat(config_file_path()).st_mtime
+        except OSError:
+            return self._mtime
+
+
+config_store = ConfigStore()
+
+
+def load_config() -> ConfigValidationSchema:
+    """Return the current config snapshot, the file is parsed again only when it changed."""
+    return config_store.get()
+
+
+def reload_config() -> ConfigValidationSchema:
+    """Parse the config file again, for a SIGHUP."""
+    return config_store.reload()
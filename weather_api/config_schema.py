@@ -1,9 +1,17 @@
 """Schema to validate config before using."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+
+class RateLimitSchema(BaseModel):
+    per_minute: int
+    per_day: int | None = None
+    burst: int | None = None
 
 
 class ConfigValidationSchema(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     service: str
     host: str
     port: str
@@ -11,8 +19,44 @@ class ConfigValidationSchema(BaseModel):
     weather_api_com_key: str
     weather_now_provider: str
     weather_forecast_provider: str
+    weather_now_fallback_providers: list[str] = []
+    weather_forecast_fallback_providers: list[str] = []
+    hedge_delay: float = 1.0
+    batch_concurrency: int = 10
+    batch_max_cities: int = 500
     storage_type: str
     database_url: str | None = None
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30
+    database_echo: bool = False
+    database_create_schema: bool = True
+    city_cache_max_entries: int = 10000
+    write_behind: bool = False
+    write_behind_max_queue: int = 10000
+    write_behind_batch_size: int = 500
+    write_behind_flush_interval: float = 0.05
     directory_path: str
     weather_records_file_name: str
     cities_file_name: str
+    connect_timeout: float = 3.0
+    read_timeout: float = 10.0
+    min_read_timeout: float = 1.0
+    breaker_failure_threshold: float = 0.5
+    breaker_min_calls: int = 10
+    breaker_reset_timeout: float = 30
+    breaker_slow_call_duration: float = 5.0
+    cache_ttl_current: float = 600
+    cache_ttl_forecast: float = 10800
+    cache_max_entries: int = 2048
+    cache_max_bytes: int = 64 * 1024 * 1024
+    shared_cache_path: str | None = None
+    # Expired entries of the shared cache are served while refreshed for this many seconds,
+    # only when shared_cache_path is set.
+    cache_stale_grace: float = 0
+    location_cache_path: str | None = None
+    location_cache_max_entries: int = 10000
+    rate_limit_path: str | None = None
+    rate_limit_max_wait: float = 2.0
+    rate_limits: dict[str, RateLimitSchema] = {}
+    config_reload_interval: float = 5.0
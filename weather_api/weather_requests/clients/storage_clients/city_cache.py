@@ -0,0 +1,72 @@
+"""Bounded in-process cache of the ids of the stored cities."""
+
+from collections import OrderedDict
+from typing import Iterable
+from uuid import UUID
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from weather_api.weather_requests.weather_models import City
+
+CityKey = tuple[str, str]
+
+
+class CityIdCache:
+    """LRU of (city_name, country) -> City.id shared by the storage clients.
+
+    A city id never changes once stored, so entries only leave the cache when
+    the cache is full or when the city is deleted through the ORM.
+    """
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CityKey, UUID] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, city_name: str, country: str) -> UUID | None:
+        with self._lock:
+            city_id = self._entries.get((city_name, country))
+            if city_id is not None:
+                self._entries.move_to_end((city_name, country))
+            return city_id
+
+    def set(self, city_name: str, country: str, city_id: UUID | str) -> None:
+        if isinstance(city_id, str):
+            city_id = UUID(city_id)
+        with self._lock:
+            self._entries[(city_name, country)] = city_id
+            self._entries.move_to_end((city_name, country))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def warm(self, cities: Iterable[tuple[str, str, UUID]]) -> None:
+        """Fill the cache with (city_name, country, id) rows, at startup."""
+        for city_name, country, city_id in cities:
+            self.set(city_name, country, city_id)
+
+    def discard(self, city_name: str, country: str) -> None:
+        with self._lock:
+            self._entries.pop((city_name, country), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate_on_delete(self) -> None:
+        """Drop the deleted cities, by session.delete or by a bulk DELETE statement."""
+
+        def city_deleted(mapper, connection, city: City) -> None:
+            self.discard(city.city_name, city.country)
+
+        def cities_deleted(state: ORMExecuteState) -> None:
+            table = getattr(state.statement, "table", None)
+            if state.is_delete and getattr(table, "name", None) == City.__tablename__:
+                self.clear()
+
+        event.listen(City, "after_delete", city_deleted)
+        event.listen(Session, "do_orm_execute", cities_deleted)
@@ -1,15 +1,25 @@
 """Clients for data storage."""
 
 from abc import ABC, abstractmethod
+from typing import Any, cast
 import csv
 import os
+import uuid
 
-from sqlalchemy.engine import Engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Insert, Select, Table, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from weather_api.config import load_config
+from weather_api.weather_requests.clients.storage_clients.city_cache import CityIdCache, CityKey
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
 from weather_api.weather_requests.weather_models import City, WeatherRequest
 
+CITIES = cast(Table, City.__table__)
+WEATHER_REQUESTS = cast(Table, WeatherRequest.__table__)
+
 
 def retrieve_file_name(directory_path: str, model: type[City] | type[WeatherRequest]) -> str:
     """Retrieves the file name."""
@@ -35,6 +45,12 @@ def headers_exist(file_name: str, headers: list[str]) -> bool:
         return True
 
 
+def file_headers(file_name: str) -> list[str]:
+    """Headers of an existing file, rows keep its columns when the table gains new ones."""
+    with open(file_name, "r") as f:
+        return list(csv.DictReader(f).fieldnames or [])
+
+
 def check_row_match_filters(row: dict[str, str], filters: dict[str, str]) -> bool:
     """Given a csv row, check if the values in filters match with the ones in the row."""
     for column, value in filters.items():
@@ -43,6 +59,88 @@ def check_row_match_filters(row: dict[str, str], filters: dict[str, str]) -> boo
     return True
 
 
+def city_keys(batches: list[ForecastBatch]) -> list[CityKey]:
+    """Distinct (city_name, country) of the forecasts, in order."""
+    return list(dict.fromkeys((batch.city_name, batch.country) for batch in batches if batch))
+
+
+def city_upsert(dialect_name: str) -> Insert:
+    """INSERT of cities that leaves the existing ones untouched, so concurrent
+    requests creating the same city do not fail on its unique constraint."""
+    if dialect_name == "postgresql":
+        return postgresql.insert(CITIES).on_conflict_do_nothing(
+            index_elements=["city_name", "country"]
+        )
+    if dialect_name == "sqlite":
+        return sqlite.insert(CITIES).on_conflict_do_nothing(
+            index_elements=["city_name", "country"]
+        )
+    raise ValueError(f"Bulk city upsert is not supported on {dialect_name}.")
+
+
+def new_city_rows(keys: list[CityKey]) -> list[dict[str, Any]]:
+    return [{"id": uuid.uuid4(), "city_name": name, "country": country} for name, country in keys]
+
+
+def city_ids_query(keys: list[CityKey]) -> Select:
+    return select(City.city_name, City.country, City.id).where(
+        tuple_(City.city_name, City.country).in_(keys)
+    )
+
+
+def cached_city_ids(city_ids: CityIdCache | None, keys: list[CityKey]) -> dict[CityKey, uuid.UUID]:
+    """Ids of the cities already in the cache."""
+    if city_ids is None:
+        return {}
+    cached = {}
+    for key in keys:
+        city_id = city_ids.get(*key)
+        if city_id is not None:
+            cached[key] = city_id
+    return cached
+
+
+def remember_cities(city_ids: CityIdCache | None, cities: list) -> None:
+    """Cache the ids of the City entries, or of the csv rows of the cities file."""
+    if city_ids is None:
+        return
+    for city in cities:
+        if isinstance(city, dict):
+            city_ids.set(city["city_name"], city["country"], city["id"])
+        elif isinstance(city, City):
+            city_ids.set(city.city_name, city.country, city.id)
+
+
+def weather_rows(
+    batches: list[ForecastBatch], city_ids: dict[CityKey, uuid.UUID]
+) -> list[dict[str, Any]]:
+    """Parameters of the weather_requests rows, for a single executemany."""
+    rows = []
+    for batch in batches:
+        city_id = city_ids[(batch.city_name, batch.country)]
+        for date, weather_conditions, temperature, wind_speed, humidity in zip(
+            batch.dates,
+            batch.weather_conditions,
+            batch.temperatures,
+            batch.wind_speeds,
+            batch.humidities,
+        ):
+            rows.append(
+                {
+                    "id": uuid.uuid4(),
+                    "date": date,
+                    "weather_conditions": weather_conditions,
+                    "temperature": temperature,
+                    "wind_speed": wind_speed,
+                    "humidity": humidity,
+                    "provider": batch.provider,
+                    "observed_at": batch.retrieved_at,
+                    "city_id": city_id,
+                }
+            )
+    return rows
+
+
 class BaseStorageClient(ABC):
     @abstractmethod
     def save(self, data: list) -> None:
@@ -58,15 +156,17 @@ class BaseStorageClient(ABC):
 
 
 class DBStorageClient(BaseStorageClient):
-    def __init__(self, engine: Engine) -> None:
+    def __init__(self, session: Session, city_ids: CityIdCache | None = None) -> None:
+        """The session is owned by the caller, which closes it."""
         super().__init__()
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-        self.session = SessionLocal()
+        self.session = session
+        self.city_ids = city_ids
 
     def save(self, data: list) -> None:
         """Save list of entries in db."""
         self.session.add_all(data)
         self.session.commit()
+        remember_cities(self.city_ids, data)
 
     def read(
         self,
@@ -83,13 +183,117 @@ class DBStorageClient(BaseStorageClient):
         else:
             result = self.session.query(model).all()
 
+        if model is City:
+            remember_cities(self.city_ids, result)
+        return result
+
+    def save_forecasts(self, batches: list[ForecastBatch]) -> None:
+        """Upsert the cities and insert every forecast row with one executemany,
+        in a single transaction, without the ORM unit of work.
+        The cities in the id cache skip the upsert."""
+        try:
+            self._save_forecasts(batches)
+        except IntegrityError:
+            self.session.rollback()
+            if self.city_ids is None:
+                raise
+            # A cached city was deleted by another process, look every city up again.
+            self.city_ids.clear()
+            self._save_forecasts(batches)
+
+    def _save_forecasts(self, batches: list[ForecastBatch]) -> None:
+        keys = city_keys(batches)
+        if not keys:
+            return
+        city_ids = cached_city_ids(self.city_ids, keys)
+        missing = [key for key in keys if key not in city_ids]
+        if missing:
+            upsert = city_upsert(self.session.get_bind().dialect.name)
+            self.session.execute(upsert, new_city_rows(missing))
+            for name, country, city_id in self.session.execute(city_ids_query(missing)):
+                city_ids[(name, country)] = city_id
+        self.session.execute(insert(WEATHER_REQUESTS), weather_rows(batches, city_ids))
+        self.session.commit()
+        if self.city_ids is not None:
+            for (name, country), city_id in city_ids.items():
+                self.city_ids.set(name, country, city_id)
+
+
+class BaseAsyncStorageClient(ABC):
+    @abstractmethod
+    async def save(self, data: list) -> None:
+        """Save object(s) to the storage"""
+
+    @abstractmethod
+    async def read(
+        self,
+        filter: dict,
+        model: type[City] | type[WeatherRequest],
+    ) -> list:
+        """Read object(s) from the storage"""
+
+
+class AsyncDBStorageClient(BaseAsyncStorageClient):
+    def __init__(self, session: AsyncSession, city_ids: CityIdCache | None = None) -> None:
+        """The session is owned by the caller, which closes it."""
+        super().__init__()
+        self.session = session
+        self.city_ids = city_ids
+
+    async def save(self, data: list) -> None:
+        """Save list of entries in db, without blocking the event loop."""
+        self.session.add_all(data)
+        await self.session.commit()
+        remember_cities(self.city_ids, data)
+
+    async def read(
+        self,
+        filter: dict,
+        model: type[City] | type[WeatherRequest],
+    ) -> list:
+        """Read the model with selected filters, without blocking the event loop."""
+        statement = select(model).where(
+            *(getattr(model, key) == value for key, value in filter.items())
+        )
+        result = list((await self.session.scalars(statement)).all())
+        if model is City:
+            remember_cities(self.city_ids, result)
         return result
 
+    async def save_forecasts(self, batches: list[ForecastBatch]) -> None:
+        """Same as DBStorageClient.save_forecasts, without blocking the event loop."""
+        try:
+            await self._save_forecasts(batches)
+        except IntegrityError:
+            await self.session.rollback()
+            if self.city_ids is None:
+                raise
+            self.city_ids.clear()
+            await self._save_forecasts(batches)
+
+    async def _save_forecasts(self, batches: list[ForecastBatch]) -> None:
+        keys = city_keys(batches)
+        if not keys:
+            return
+        city_ids = cached_city_ids(self.city_ids, keys)
+        missing = [key for key in keys if key not in city_ids]
+        if missing:
+            upsert = city_upsert(self.session.get_bind().dialect.name)
+            await self.session.execute(upsert, new_city_rows(missing))
+            for name, country, city_id in await self.session.execute(city_ids_query(missing)):
+                city_ids[(name, country)] = city_id
+        await self.session.execute(insert(WEATHER_REQUESTS), weather_rows(batches, city_ids))
+        await self.session.commit()
+        if self.city_ids is not None:
+            for (name, country), city_id in city_ids.items():
+                self.city_ids.set(name, country, city_id)
+
 
 class CSVStorageClient(BaseStorageClient):
-    def __init__(self, directory_path: str) -> None:
+    def __init__(self, directory_path: str, city_ids: CityIdCache | None = None) -> None:
         super().__init__()
         self.directory_path = directory_path
+        self.city_ids = city_ids
 
     def save(self, data: list):
         """Append to an existing csv file or in a created file a list of entries."""
@@ -97,14 +301,16 @@ class CSVStorageClient(BaseStorageClient):
             file_name = retrieve_file_name(self.directory_path, entry)
             headers = [column.key for column in entry.__table__.columns]
             if file_exists(file_name):
+                headers = file_headers(file_name) or headers
                 with open(file_name, "a") as file:
                     writer = csv.DictWriter(file, fieldnames=headers)
-                    writer.writerow({field: getattr(entry, field) for field in headers})
+                    writer.writerow({field: getattr(entry, field, None) for field in headers})
             else:
                 with open(file_name, "w") as file:
                     writer = csv.DictWriter(file, fieldnames=headers)
                     writer.writeheader()
                     writer.writerow({field: getattr(entry, field) for field in headers})
+        remember_cities(self.city_ids, data)
 
     def read(
         self,
@@ -121,4 +327,9 @@ class CSVStorageClient(BaseStorageClient):
                     if check_row_match_filters(row, filter):
                         rows.append(row)
                         break
+        if model is City:
+            remember_cities(self.city_ids, rows)
         return rows
+
+
+StorageClient = DBStorageClient | AsyncDBStorageClient | CSVStorageClient
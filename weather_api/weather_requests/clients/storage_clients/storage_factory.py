@@ -1,33 +1,95 @@
 """Factory for clients for data storage."""
 
+from contextlib import asynccontextmanager
 from enum import Enum
+from functools import cache
+from typing import AsyncIterator
 import os
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from weather_api.weather_requests.clients.storage_clients.city_cache import CityIdCache
 from weather_api.weather_requests.clients.storage_clients.storage_clients import (
+    AsyncDBStorageClient,
     CSVStorageClient,
     DBStorageClient,
+    StorageClient,
 )
-from weather_api.weather_requests.weather_db_engine import get_engine
+from weather_api.weather_requests.weather_db_engine import AsyncDatabase, Database
+from weather_api.weather_requests.weather_models import City
 import weather_api.config as config
 
 
 class StorageType(str, Enum):
     DATABASE = "database"
+    ASYNC_DATABASE = "async_database"
     CSV = "csv"
 
 
-def get_storage_client(storage_type: StorageType) -> DBStorageClient | CSVStorageClient:
-    """Return client depending on storage type chosen."""
+@cache
+def get_city_id_cache() -> CityIdCache:
+    """Return the city id cache shared by every storage client of this process."""
+    city_ids = CityIdCache(config.load_config().city_cache_max_entries)
+    city_ids.invalidate_on_delete()
+    return city_ids
+
+
+async def warm_city_id_cache(
+    database: Database | None = None, async_database: AsyncDatabase | None = None
+) -> None:
+    """Load the stored cities into the cache, at startup."""
+    city_ids = get_city_id_cache()
+    query = select(City.city_name, City.country, City.id).limit(city_ids.max_entries)
+    if database is not None:
+        with database.sessions() as session:
+            city_ids.warm(session.execute(query))
+    if async_database is not None:
+        async with async_database.sessions() as async_session:
+            city_ids.warm(await async_session.execute(query))
+
+
+def get_storage_client(
+    storage_type: StorageType,
+    session: Session | None = None,
+    async_session: AsyncSession | None = None,
+) -> StorageClient:
+    """Return client depending on storage type chosen.
+    The database clients work on the given session, opened by the caller."""
     if storage_type == StorageType.DATABASE:
-        configuration = get_engine(config.load_config().database_url)
-        return DBStorageClient(engine=configuration)
+        if session is None:
+            raise ValueError("The database storage needs a configured database_url.")
+        return DBStorageClient(session=session, city_ids=get_city_id_cache())
+    elif storage_type == StorageType.ASYNC_DATABASE:
+        if async_session is None:
+            raise ValueError("The async_database storage needs a configured database_url.")
+        return AsyncDBStorageClient(session=async_session, city_ids=get_city_id_cache())
     elif storage_type == StorageType.CSV:
         directory_path = os.getenv(config.load_config().directory_path)
         if directory_path:
             return CSVStorageClient(
                 directory_path,
+                city_ids=get_city_id_cache(),
             )
         else:
             raise ValueError(f"{directory_path} is not a valid directory path.")
     else:
         raise ValueError(f"{storage_type} is not a valid storage type.")
+
+
+@asynccontextmanager
+async def open_storage_client(
+    storage_type: StorageType,
+    database: Database | None = None,
+    async_database: AsyncDatabase | None = None,
+) -> AsyncIterator[StorageClient]:
+    """Storage client on its own session, for work outside of a request."""
+    if storage_type == StorageType.ASYNC_DATABASE and async_database is not None:
+        async with async_database.sessions() as async_session:
+            yield get_storage_client(storage_type, async_session=async_session)
+    elif storage_type == StorageType.DATABASE and database is not None:
+        with database.sessions() as session:
+            yield get_storage_client(storage_type, session=session)
+    else:
+        yield get_storage_client(storage_type)
@@ -1,12 +1,29 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator, Optional, Union, overload
+import asyncio
 import textwrap
+import time
 
 from requests import Response
+import httpx
+import orjson
 import requests
 
+from weather_api.weather_requests.clients.weather_clients.circuit_breaker import CircuitBreaker
+from weather_api.weather_requests.clients.weather_clients.http_transport import (
+    get_async_http_client,
+    get_http_session,
+)
+from weather_api.weather_requests.clients.weather_clients.latency import get_latency_tracker
+from weather_api.weather_requests.clients.weather_clients.location_cache import (
+    LocationCache,
+    ResolvedLocation,
+)
+from weather_api.weather_requests.clients.weather_clients.rate_limiter import RateLimiter
+from weather_api.weather_requests.clients.weather_clients.response_cache import ResponseCache
+
 
 class BadCityException(Exception):
     pass
@@ -16,43 +33,352 @@ class BadApiException(Exception):
     pass
 
 
+class CircuitOpenException(BadApiException):
+    pass
+
+
+class RateLimitException(BadApiException):
+    pass
+
+
 @dataclass
 class ForecastClientConfig:
     api_key: str | None
     units: Optional[str] = "metric"
+    connect_timeout: float = 3.0
+    read_timeout: float = 10.0
+    min_read_timeout: float = 1.0
+    response_cache: ResponseCache | None = None
+    circuit_breaker: CircuitBreaker | None = None
+    rate_limiter: RateLimiter | None = None
+    location_cache: LocationCache | None = None
 
 
 class BaseWeatherClient(ABC):
+    # Longest forecast the provider returns, fetched once and sliced for shorter requests.
+    max_forecast_days: int = 10
+
+    @property
+    def provider_name(self) -> str:
+        return type(self).__name__
+
     @abstractmethod
     def get_current_weather(
         self,
         city: str,
         country_code: str,
-    ) -> list["DayForecast"]:
+    ) -> "ForecastBatch":
         """Get current weather in given city."""
 
     @abstractmethod
     def get_long_weather_forecast(
         self, city: str, country_code: str, days: int = 10
-    ) -> list["DayForecast"]:
+    ) -> "ForecastBatch":
         """Get weather forecast for n days, depending on days variable."""
 
+    @abstractmethod
+    async def get_current_weather_async(
+        self,
+        city: str,
+        country_code: str,
+    ) -> "ForecastBatch":
+        """Get current weather in given city without blocking the event loop."""
+
+    @abstractmethod
+    async def get_long_weather_forecast_async(
+        self, city: str, country_code: str, days: int = 10
+    ) -> "ForecastBatch":
+        """Get weather forecast for n days without blocking the event loop."""
+
+
+class CallEndpointMixin(ABC):
+    http2: bool = False
+    # Maps each endpoint to its kind of data, used to pick the cache TTL.
+    endpoint_kinds: dict[str, str] = {}
 
-class CallEndpointMixin:
     def __init__(self, config: ForecastClientConfig) -> None:
         self.api_key = config.api_key
         self.units = config.units
+        self.connect_timeout = config.connect_timeout
+        self.read_timeout = config.read_timeout
+        self.min_read_timeout = config.min_read_timeout
+        self.response_cache = config.response_cache
+        self.circuit_breaker = config.circuit_breaker
+        self.rate_limiter = config.rate_limiter
+        self.location_cache = config.location_cache
+        self.latency_tracker = get_latency_tracker(type(self).__name__)
 
     def build_url(self, base_url: str, endpoint: str) -> str:
         url = f"{base_url}/{endpoint}"
         return url
 
+    def load_location(self, city: str, country_code: str) -> None:
+        """Load the location resolved by an earlier call, from the file of the cache."""
+        if self.location_cache is not None:
+            self.location_cache.get(city, country_code)
+
+    async def load_location_async(self, city: str, country_code: str) -> None:
+        """Same as load_location, reading the file from a thread on a miss in memory."""
+        if self.location_cache is not None and not self.location_cache.cached(city, country_code):
+            await asyncio.to_thread(self.location_cache.get, city, country_code)
+
+    def location_query(self, city: str, country_code: str) -> dict:
+        """Query parameters for the location, by coordinates once the provider resolved it
+        and the location is loaded."""
+        if self.location_cache is not None:
+            location = self.location_cache.cached(city, country_code)
+            if location is not None:
+                return self.coordinate_query(location)
+        return {"q": f"{city},{country_code}"}
+
+    def coordinate_query(self, location: ResolvedLocation) -> dict:
+        return {"q": f"{location.latitude},{location.longitude}"}
+
+    def resolved_location(self, weather_dictionary: dict) -> ResolvedLocation | None:
+        """Canonical location found in the provider answer, None if it has no coordinates."""
+        if weather_dictionary.get("latitude") is None:
+            return None
+        return ResolvedLocation(
+            city_name=weather_dictionary["city_name"],
+            country=weather_dictionary["country"],
+            latitude=weather_dictionary["latitude"],
+            longitude=weather_dictionary["longitude"],
+            tz_id=weather_dictionary.get("tz_id"),
+        )
+
+    def remember_location(self, city: str, country_code: str, weather_dictionary: dict) -> None:
+        """Cache the location the provider resolved, so the next calls skip the name lookup."""
+        if self.location_cache is None or self.location_cache.cached(city, country_code):
+            return
+        location = self.resolved_location(weather_dictionary)
+        if location is not None:
+            self.location_cache.set(city, country_code, location)
+
+    async def remember_location_async(
+        self, city: str, country_code: str, weather_dictionary: dict
+    ) -> None:
+        """Same as remember_location, writing the file from a thread."""
+        if self.location_cache is None or self.location_cache.cached(city, country_code):
+            return
+        location = self.resolved_location(weather_dictionary)
+        if location is not None:
+            await asyncio.to_thread(self.location_cache.set, city, country_code, location)
+
+    def adaptive_read_timeout(self) -> float:
+        """Three times the recent p99 latency, bounded by min_read_timeout and read_timeout."""
+        p99 = self.latency_tracker.percentile(99)
+        if p99 is None:
+            return self.read_timeout
+        return min(self.read_timeout, max(self.min_read_timeout, p99 * 3))
+
+    def record_call(self, success: bool, start: float) -> None:
+        """Feed the outcome and latency of a provider call to the breaker and the tracker."""
+        duration = time.perf_counter() - start
+        if success:
+            self.latency_tracker.record(duration)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(success, duration)
+
+    def release_call(self) -> None:
+        """A provider call was cancelled or failed before any outcome, free the breaker probe."""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.release()
+
+    async def acquire_token(self) -> bool:
+        """Wait for a rate limit token once the breaker let the call through,
+        freeing its probe when no token comes."""
+        if self.rate_limiter is None:
+            return True
+        try:
+            acquired = await self.rate_limiter.acquire()
+        except BaseException:
+            self.release_call()
+            raise
+        if not acquired:
+            self.release_call()
+        return acquired
+
+    def acquire_token_blocking(self) -> bool:
+        if self.rate_limiter is None:
+            return True
+        try:
+            acquired = self.rate_limiter.acquire_blocking()
+        except BaseException:
+            self.release_call()
+            raise
+        if not acquired:
+            self.release_call()
+        return acquired
+
+    @staticmethod
+    def is_provider_failure(status_code: int) -> bool:
+        return status_code >= 500 or status_code == 429
+
     def call_endpoint(self, endpoint: str, parameters: dict) -> Response:
-        response = requests.get(endpoint, params=parameters, verify=False)
+        start = time.perf_counter()
+        try:
+            response = get_http_session(endpoint).get(
+                endpoint,
+                params=parameters,
+                timeout=(self.connect_timeout, self.adaptive_read_timeout()),
+            )
+        except requests.RequestException:
+            self.record_call(False, start)
+            raise
+        except BaseException:
+            self.release_call()
+            raise
+        self.record_call(not self.is_provider_failure(response.status_code), start)
+        return response
+
+    async def call_endpoint_async(self, endpoint: str, parameters: dict) -> httpx.Response:
+        """Call the endpoint through the pooled keep-alive client of its origin."""
+        timeout = httpx.Timeout(self.adaptive_read_timeout(), connect=self.connect_timeout)
+        client = get_async_http_client(endpoint, timeout, self.http2)
+        start = time.perf_counter()
+        try:
+            response = await client.get(endpoint, params=parameters, timeout=timeout)
+        except httpx.TransportError as e:
+            self.record_call(False, start)
+            raise BadApiException(f"Provider unreachable: {e!r}") from e
+        except BaseException:
+            self.release_call()
+            raise
+        self.record_call(not self.is_provider_failure(response.status_code), start)
         return response
 
+    @staticmethod
+    def decode_json(response: Response | httpx.Response) -> Any:
+        """Decode the body with orjson, several times faster than json on long forecasts."""
+        return orjson.loads(response.content)
 
-@dataclass
+    @abstractmethod
+    def parse_weather_response(
+        self, response: Response | httpx.Response, parameters: dict
+    ) -> dict:
+        """Check the status of the provider response and return the weather dictionary.
+
+        The weather dictionary holds only the fields DayForecast needs:
+        city_name, country, city_timezone (utc offset in seconds), latitude, longitude,
+        tz_id and days, a list of dicts with dt, temperature, weather_conditions,
+        wind_speed and humidity.
+        """
+
+    def endpoint_kind(self, weather_url: str) -> str:
+        for endpoint, kind in self.endpoint_kinds.items():
+            if weather_url.endswith(endpoint):
+                return kind
+        return weather_url
+
+    def response_cache_key(self, weather_url: str, parameters: dict) -> tuple:
+        """Key responses by provider, endpoint, location and units, not by api key.
+        Resolved locations are queried by coordinates, so spelling variants share the key."""
+        if "q" in parameters:
+            parts = str(parameters["q"]).lower().split(",")
+            location = ",".join(" ".join(part.split()) for part in parts)
+        else:
+            location = f"{parameters.get('lat')},{parameters.get('lon')}"
+        return (type(self).__name__, weather_url, location, self.units)
+
+    def stale_fallback(self, cache_key: tuple, error: BadApiException) -> dict:
+        """While the provider is failing, answer with expired cached data or raise the error."""
+        if self.response_cache is not None:
+            weather_dictionary = self.response_cache.get_stale(cache_key)
+            if weather_dictionary is not None:
+                return weather_dictionary
+        raise error
+
+    def circuit_open_error(self) -> CircuitOpenException:
+        return CircuitOpenException(
+            f"{type(self).__name__} is unavailable, circuit open after repeated failures."
+        )
+
+    def rate_limit_error(self) -> RateLimitException:
+        return RateLimitException(f"{type(self).__name__} call quota exhausted, try again later.")
+
+    def provider_failure_error(self, response: Response | httpx.Response) -> BadApiException:
+        return BadApiException(f"Provider failure: status code {response.status_code}.")
+
+    def get_weather_dictionary(self, weather_url: str, parameters: dict) -> dict:
+        """Helper to call the endpoint and extract values for both now and long forecast."""
+        cache_key = self.response_cache_key(weather_url, parameters)
+        if self.response_cache is not None:
+            weather_dictionary = self.response_cache.get(cache_key)
+            if weather_dictionary is not None:
+                return weather_dictionary
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow_request():
+            return self.stale_fallback(cache_key, self.circuit_open_error())
+        if not self.acquire_token_blocking():
+            return self.stale_fallback(cache_key, self.rate_limit_error())
+
+        response = self.call_endpoint(weather_url, parameters)
+        if self.is_provider_failure(response.status_code):
+            return self.stale_fallback(cache_key, self.provider_failure_error(response))
+        weather_dictionary = self.parse_weather_response(response, parameters)
+        weather_dictionary["retrieved_at"] = datetime.now(timezone.utc)
+        weather_dictionary["provider"] = type(self).__name__
+        self.cache_weather_dictionary(cache_key, weather_url, weather_dictionary, response)
+        return weather_dictionary
+
+    async def get_weather_dictionary_async(self, weather_url: str, parameters: dict) -> dict:
+        """Same as get_weather_dictionary, awaiting the pooled async transport."""
+        cache_key = self.response_cache_key(weather_url, parameters)
+        if self.response_cache is not None:
+            weather_dictionary = self.response_cache.get(cache_key)
+            if weather_dictionary is not None:
+                return weather_dictionary
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow_request():
+            return self.stale_fallback(cache_key, self.circuit_open_error())
+        if not await self.acquire_token():
+            return self.stale_fallback(cache_key, self.rate_limit_error())
+
+        response = await self.call_endpoint_async(weather_url, parameters)
+        if self.is_provider_failure(response.status_code):
+            return self.stale_fallback(cache_key, self.provider_failure_error(response))
+        weather_dictionary = self.parse_weather_response(response, parameters)
+        weather_dictionary["retrieved_at"] = datetime.now(timezone.utc)
+        weather_dictionary["provider"] = type(self).__name__
+        self.cache_weather_dictionary(cache_key, weather_url, weather_dictionary, response)
+        return weather_dictionary
+
+    def cache_weather_dictionary(
+        self,
+        cache_key: tuple,
+        weather_url: str,
+        weather_dictionary: dict,
+        response: Response | httpx.Response,
+    ) -> None:
+        if self.response_cache is not None:
+            self.response_cache.set(
+                cache_key,
+                weather_dictionary,
+                self.endpoint_kind(weather_url),
+                len(response.content),
+            )
+
+    @staticmethod
+    def forecasts_from_dict(weather_dictionary: dict, days: int | None = None) -> "ForecastBatch":
+        """Map the weather dictionary straight to a ForecastBatch, up to the requested days,
+        marked with the provider and the time it answered, cached or not."""
+        city_timezone = timezone(timedelta(seconds=weather_dictionary["city_timezone"]))
+        selected_days = weather_dictionary["days"][:days]
+        return ForecastBatch(
+            city_name=weather_dictionary["city_name"],
+            country=weather_dictionary["country"],
+            dates=[
+                datetime.utcfromtimestamp(day["dt"]).replace(tzinfo=city_timezone)
+                for day in selected_days
+            ],
+            temperatures=[day["temperature"] for day in selected_days],
+            weather_conditions=[day["weather_conditions"] for day in selected_days],
+            wind_speeds=[day["wind_speed"] for day in selected_days],
+            humidities=[day["humidity"] for day in selected_days],
+            retrieved_at=weather_dictionary.get("retrieved_at"),
+            provider=weather_dictionary.get("provider"),
+        )
+
+
+@dataclass(slots=True)
 class DayForecast:
     """Dataclass that will be filled by the weather clients"""
 
@@ -63,6 +389,8 @@ class DayForecast:
     country: str
     wind_speed: float
     humidity: float
+    retrieved_at: datetime | None = None
+    provider: str | None = None
 
     def __str__(self) -> str:
         return textwrap.dedent(
@@ -76,3 +404,103 @@ class DayForecast:
         Country: {self.country}
         """
         )
+
+
+@dataclass(slots=True)
+class ForecastBatch:
+    """Forecasts of one city stored by column, the city and country held once.
+
+    Indexing and iteration give DayForecast objects, built on demand,
+    slicing gives a ForecastBatch, so a batch can replace a list of DayForecast.
+    """
+
+    city_name: str
+    country: str
+    dates: list[datetime] = field(default_factory=list)
+    temperatures: list[float] = field(default_factory=list)
+    weather_conditions: list[str] = field(default_factory=list)
+    wind_speeds: list[float] = field(default_factory=list)
+    humidities: list[float] = field(default_factory=list)
+    retrieved_at: datetime | None = None
+    provider: str | None = None
+
+    @classmethod
+    def of(cls, forecasts: Union["ForecastBatch", Iterable]) -> "ForecastBatch":
+        """Return forecasts as a ForecastBatch, from any objects with the DayForecast fields."""
+        if isinstance(forecasts, ForecastBatch):
+            return forecasts
+        forecasts = list(forecasts)
+        if not forecasts:
+            return cls(city_name="", country="")
+        return cls(
+            city_name=forecasts[0].city_name,
+            country=forecasts[0].country,
+            dates=[forecast.date for forecast in forecasts],
+            temperatures=[forecast.temperature for forecast in forecasts],
+            weather_conditions=[forecast.weather_conditions for forecast in forecasts],
+            wind_speeds=[forecast.wind_speed for forecast in forecasts],
+            humidities=[forecast.humidity for forecast in forecasts],
+            retrieved_at=getattr(forecasts[0], "retrieved_at", None),
+            provider=getattr(forecasts[0], "provider", None),
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @overload
+    def __getitem__(self, index: int) -> DayForecast:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ForecastBatch":
+        ...
+
+    def __getitem__(self, index: int | slice) -> Union[DayForecast, "ForecastBatch"]:
+        if isinstance(index, slice):
+            return ForecastBatch(
+                city_name=self.city_name,
+                country=self.country,
+                dates=self.dates[index],
+                temperatures=self.temperatures[index],
+                weather_conditions=self.weather_conditions[index],
+                wind_speeds=self.wind_speeds[index],
+                humidities=self.humidities[index],
+                retrieved_at=self.retrieved_at,
+                provider=self.provider,
+            )
+        return DayForecast(
+            date=self.dates[index],
+            temperature=self.temperatures[index],
+            weather_conditions=self.weather_conditions[index],
+            city_name=self.city_name,
+            country=self.country,
+            wind_speed=self.wind_speeds[index],
+            humidity=self.humidities[index],
+            retrieved_at=self.retrieved_at,
+            provider=self.provider,
+        )
+
+    def __iter__(self) -> Iterator[DayForecast]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def rows(self) -> list[dict]:
+        """One dict per day with the fields of the weather responses."""
+        return [
+            {
+                "date": date,
+                "weather_conditions": weather_conditions,
+                "temperature": temperature,
+                "wind_speed": wind_speed,
+                "humidity": humidity,
+                "city_name": self.city_name,
+                "country": self.country,
+            }
+            for date, temperature, weather_conditions, wind_speed, humidity in zip(
+                self.dates,
+                self.temperatures,
+                self.weather_conditions,
+                self.wind_speeds,
+                self.humidities,
+            )
+        ]
@@ -0,0 +1,78 @@
+"""Circuit breaker guarding the calls to one weather provider."""
+
+from collections import deque
+from enum import Enum
+from typing import Callable
+import time
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Opens when the error rate of the last calls reaches failure_threshold.
+
+    While open every call is rejected. After reset_timeout seconds a single probe is let
+    through (half open), its outcome closes the circuit again or reopens it.
+    Calls slower than slow_call_duration count as failures.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: float = 0.5,
+        min_calls: int = 10,
+        window_size: int = 50,
+        reset_timeout: float = 30,
+        slow_call_duration: float = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.slow_call_duration = slow_call_duration
+        self.clock = clock
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self.outcomes: deque[bool] = deque(maxlen=window_size)
+        self._probe_in_flight = False
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def allow_request(self) -> bool:
+        if self.state == CircuitState.OPEN:
+            if self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = CircuitState.HALF_OPEN
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record(self, success: bool, duration: float = 0.0) -> None:
+        success = success and duration < self.slow_call_duration
+        if self.state == CircuitState.HALF_OPEN:
+            self._probe_in_flight = False
+            if success:
+                self.state = CircuitState.CLOSED
+                self.outcomes.clear()
+            else:
+                self.open()
+            return
+        self.outcomes.append(success)
+        if len(self.outcomes) >= self.min_calls and self.error_rate() >= self.failure_threshold:
+            self.open()
+
+    def release(self) -> None:
+        """The call ended without an outcome, as a cancelled one, the next call may probe."""
+        self._probe_in_flight = False
+
+    def open(self) -> None:
+        self.state = CircuitState.OPEN
+        self.opened_at = self.clock()
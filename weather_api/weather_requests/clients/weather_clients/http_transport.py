@@ -0,0 +1,54 @@
+"""Pooled HTTP transports shared by the weather clients."""
+
+import httpx
+import requests
+
+_async_clients: dict[str, httpx.AsyncClient] = {}
+_sessions: dict[str, requests.Session] = {}
+
+
+def origin_of(url: str) -> str:
+    """Return scheme, host and port of the url, used as the pool key."""
+    parsed_url = httpx.URL(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc.decode()}"
+
+
+def get_async_http_client(
+    url: str,
+    timeout: httpx.Timeout,
+    http2: bool = False,
+) -> httpx.AsyncClient:
+    """Return the keep-alive client for the origin of the url, creating it on first use."""
+    origin = origin_of(url)
+    client = _async_clients.get(origin)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+        _async_clients[origin] = client
+    return client
+
+
+async def close_async_http_clients() -> None:
+    """Close every pooled client, to be called on application shutdown."""
+    while _async_clients:
+        _, client = _async_clients.popitem()
+        await client.aclose()
+
+
+def get_http_session(url: str) -> requests.Session:
+    """Return the keep-alive session for the origin of the url, used by the blocking calls."""
+    origin = origin_of(url)
+    session = _sessions.get(origin)
+    if session is None:
+        session = _sessions.setdefault(origin, requests.Session())
+    return session
+
+
+def close_http_sessions() -> None:
+    """Close every pooled session, to be called on application shutdown."""
+    while _sessions:
+        _, session = _sessions.popitem()
+        session.close()
@@ -0,0 +1,32 @@
+"""Rolling latency statistics per weather provider."""
+
+from collections import deque
+import math
+
+_trackers: dict[str, "LatencyTracker"] = {}
+
+
+class LatencyTracker:
+    """Keeps the last window_size latencies, in seconds, of one provider."""
+
+    def __init__(self, window_size: int = 200, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+        self.samples: deque[float] = deque(maxlen=window_size)
+
+    def record(self, latency: float) -> None:
+        self.samples.append(latency)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the percentile of the window, None until enough samples are collected."""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(math.ceil(percent / 100 * len(ordered)) - 1, len(ordered) - 1)
+        return ordered[max(index, 0)]
+
+
+def get_latency_tracker(provider: str) -> LatencyTracker:
+    """Return the tracker of the provider, shared by every client instance of this process."""
+    if provider not in _trackers:
+        _trackers[provider] = LatencyTracker()
+    return _trackers[provider]
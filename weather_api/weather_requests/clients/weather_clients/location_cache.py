@@ -0,0 +1,89 @@
+"""Persistent cache of locations resolved by the providers."""
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+import json
+import sqlite3
+import threading
+
+
+@dataclass(frozen=True)
+class ResolvedLocation:
+    """Canonical location returned by a provider for a city and country code."""
+
+    city_name: str
+    country: str
+    latitude: float
+    longitude: float
+    tz_id: str | None = None
+
+
+def location_key(city: str, country_code: str) -> str:
+    """Normalize city and country code, so spelling variants in case and spaces match."""
+    return f"{' '.join(city.split()).lower()},{country_code.strip().lower()}"
+
+
+class LocationCache:
+    """Maps (city, country code) to the ResolvedLocation, in a bounded LRU in memory and,
+    with a path, in a SQLite file shared by the workers and kept across restarts.
+
+    get and set do the file I/O, cached reads the memory only.
+    """
+
+    def __init__(self, path: str | None = None, max_entries: int = 10000) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._locations: OrderedDict[str, ResolvedLocation] = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if self.path:
+            self.connection().execute(
+                "CREATE TABLE IF NOT EXISTS locations (key TEXT PRIMARY KEY, payload TEXT NOT NULL)"
+            )
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(str(self.path), timeout=5, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def cached(self, city: str, country_code: str) -> ResolvedLocation | None:
+        key = location_key(city, country_code)
+        with self._lock:
+            location = self._locations.get(key)
+            if location is not None:
+                self._locations.move_to_end(key)
+            return location
+
+    def remember(self, key: str, location: ResolvedLocation) -> None:
+        with self._lock:
+            self._locations[key] = location
+            self._locations.move_to_end(key)
+            while len(self._locations) > self.max_entries:
+                self._locations.popitem(last=False)
+
+    def get(self, city: str, country_code: str) -> ResolvedLocation | None:
+        location = self.cached(city, country_code)
+        if location is None and self.path:
+            key = location_key(city, country_code)
+            row = (
+                self.connection()
+                .execute("SELECT payload FROM locations WHERE key = ?", (key,))
+                .fetchone()
+            )
+            if row is not None:
+                location = ResolvedLocation(**json.loads(row[0]))
+                self.remember(key, location)
+        return location
+
+    def set(self, city: str, country_code: str, location: ResolvedLocation) -> None:
+        if self.cached(city, country_code) == location:
+            return
+        key = location_key(city, country_code)
+        self.remember(key, location)
+        if self.path:
+            self.connection().execute(
+                "INSERT OR REPLACE INTO locations (key, payload) VALUES (?, ?)",
+                (key, json.dumps(asdict(location))),
+            )
@@ -1,140 +1,158 @@
 """OPENWEATHER client to get weather today for given city"""
 
-from datetime import datetime, timedelta, timezone
 import os
 
-import pycountry
+import httpx
+import requests
 
 from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
     BadApiException,
     BadCityException,
     BaseWeatherClient,
     CallEndpointMixin,
-    DayForecast,
+    ForecastBatch,
     ForecastClientConfig,
 )
-
-
-class OpenWeatherMapForecast(DayForecast):
-    @classmethod
-    def from_weather_dict(
-        cls,
-        weather_dictionary: dict,
-        city_timezone: int,
-        city_name: str,
-        country_name: str,
-    ) -> "DayForecast":
-        """Populates DayForecast for the openweathermap_client."""
-
-        weather_condition_list: list = weather_dictionary["weather"]
-
-        utc_date = weather_dictionary["dt"]
-        local_date = datetime.utcfromtimestamp(utc_date)
-        local_date = local_date.replace(tzinfo=timezone(timedelta(seconds=city_timezone)))
-
-        weather_forecast = cls(
-            date=local_date,
-            temperature=weather_dictionary["main"]["temp"],
-            weather_conditions=weather_condition_list[0]["description"],
-            city_name=city_name,
-            country=country_name,
-            wind_speed=weather_dictionary["wind"]["speed"],
-            humidity=weather_dictionary["main"]["humidity"],
-        )
-
-        return weather_forecast
+from weather_api.weather_requests.clients.weather_clients.location_cache import ResolvedLocation
+from weather_api.weather_requests.countries import country_name
 
 
 class OpenWeatherMapClient(BaseWeatherClient, CallEndpointMixin):
     """Client to get current weather, current or forecast."""
 
     base_url = "https://api.openweathermap.org/data/2.5/"
-
-    def get_weather_dictionary(self, weather_url: str, parameters: dict) -> dict:
-        """Helper to call the endpoint and extract values for both methods, now and long forecast."""
-
-        response = self.call_endpoint(weather_url, parameters)
+    http2 = True
+    max_forecast_days = 16
+    endpoint_kinds = {"weather": "current", "forecast/daily": "forecast"}
+
+    def parse_weather_response(
+        self, response: requests.Response | httpx.Response, parameters: dict
+    ) -> dict:
+        """Check the status of the provider response and select the forecast fields."""
         if response.status_code == 404:
-            raise BadCityException(f"Location {parameters['q']} is not found.")
+            location = parameters.get("q") or f"{parameters['lat']},{parameters['lon']}"
+            raise BadCityException(f"Location {location} is not found.")
         elif response.status_code == 401:
             responsedict = response.json()
             raise BadApiException(
                 f"Failure core: {responsedict['cod']}. {responsedict['message']}"
             )
 
-        weather_dictionary = response.json()
-        return weather_dictionary
+        return self.select_fields(self.decode_json(response))
+
+    @staticmethod
+    def select_fields(payload: dict) -> dict:
+        """Keep the fields of the current (https://openweathermap.org/current) or daily
+        (https://openweathermap.org/forecast16) json that DayForecast needs."""
+        if "list" in payload:
+            city = payload["city"]
+            country_code = city["country"]
+            days = [
+                {
+                    "dt": day["dt"],
+                    "temperature": day["temp"]["day"],
+                    "weather_conditions": day["weather"][0]["description"],
+                    "wind_speed": day["speed"],
+                    "humidity": day["humidity"],
+                }
+                for day in payload["list"]
+            ]
+        else:
+            city = payload
+            country_code = payload["sys"]["country"]
+            days = [
+                {
+                    "dt": payload["dt"],
+                    "temperature": payload["main"]["temp"],
+                    "weather_conditions": payload["weather"][0]["description"],
+                    "wind_speed": payload["wind"]["speed"],
+                    "humidity": payload["main"]["humidity"],
+                }
+            ]
+        coordinates = city.get("coord", {})
+        return {
+            "city_name": city["name"],
+            "country": country_name(country_code) or country_code,
+            "city_timezone": city["timezone"],
+            "latitude": coordinates.get("lat"),
+            "longitude": coordinates.get("lon"),
+            "days": days,
+        }
+
+    def coordinate_query(self, location: ResolvedLocation) -> dict:
+        return {"lat": location.latitude, "lon": location.longitude}
+
+    def current_weather_request(self, city: str, country_code: str) -> tuple[str, dict]:
+        """Build url and parameters for the current weather endpoint."""
+        endpoint = "weather"
+        weather_url = self.build_url(self.base_url, endpoint)
+        parameters = {
+            **self.location_query(city, country_code),
+            "units": self.units,
+            "appid": self.api_key,
+        }
+        return weather_url, parameters
 
     def get_current_weather(
         self,
         city: str,
         country_code: str,
-    ) -> list[DayForecast]:
+    ) -> ForecastBatch:
         """First builds the url and call the endpoints, which returns a dict
         then sends the dict to dataclass to have today's weather"""
-        endpoint = "weather"
-        weather_url = self.build_url(self.base_url, endpoint)
-        parameters = {"q": f"{city},{country_code}", "units": self.units, "appid": self.api_key}
-
+        self.load_location(city, country_code)
+        weather_url, parameters = self.current_weather_request(city, country_code)
         weather_dictionary = self.get_weather_dictionary(weather_url, parameters)
+        self.remember_location(city, country_code, weather_dictionary)
+        return self.forecasts_from_dict(weather_dictionary)
 
-        city_timezone = weather_dictionary["timezone"]
-        city_name = weather_dictionary["name"]
-        country = pycountry.countries.get(alpha_2=weather_dictionary["sys"]["country"]).name
-        day = OpenWeatherMapForecast.from_weather_dict(
-            weather_dictionary, city_timezone, city_name, country
-        )
-        weather_forecast = [day]
-        return weather_forecast
-
-    @staticmethod
-    def transform_forecast_dict(day_forecast: dict) -> dict:
-        """Transform the 14 days json into a dictionary that can be sent to from_weather_dict.
-        Input json example: https://openweathermap.org/forecast16.
-        Output mirrors json: https://openweathermap.org/current
-        """
-        one_day_forecast = {}
-        one_day_forecast["dt"] = day_forecast["dt"]
-        one_day_forecast["main"] = {"temp": day_forecast["temp"]["day"]}
-        weather_conditions_list = day_forecast["weather"]
-        weather_conditions = weather_conditions_list[0]["description"]
-        one_day_forecast["weather"] = [{"description": weather_conditions}]
-        one_day_forecast["wind"] = {"speed": day_forecast["speed"]}
-        one_day_forecast["main"] = {"humidity": day_forecast["humidity"]}
-
-        return one_day_forecast
+    async def get_current_weather_async(
+        self,
+        city: str,
+        country_code: str,
+    ) -> ForecastBatch:
+        """Async variant of get_current_weather."""
+        await self.load_location_async(city, country_code)
+        weather_url, parameters = self.current_weather_request(city, country_code)
+        weather_dictionary = await self.get_weather_dictionary_async(weather_url, parameters)
+        await self.remember_location_async(city, country_code, weather_dictionary)
+        return self.forecasts_from_dict(weather_dictionary)
+
+    def long_forecast_request(self, city: str, country_code: str) -> tuple[str, dict]:
+        """Build url and parameters for the daily forecast endpoint."""
+        endpoint = "forecast/daily"
+        weather_url = self.build_url(self.base_url, endpoint)
+        parameters = {
+            **self.location_query(city, country_code),
+            "units": self.units,
+            "appid": self.api_key,
+            "cnt": self.max_forecast_days,
+        }
+        return weather_url, parameters
 
     def get_long_weather_forecast(
         self, city: str, country_code: str, days: int = 10
-    ) -> list[DayForecast]:
+    ) -> ForecastBatch:
         """First builds the url and call the endpoints, which returns a dict
         then sends the dict to dataclass to have 14 days weather"""
-        endpoint = "forecast/daily"
-        weather_url = self.build_url(self.base_url, endpoint)
-        parameters = {"q": f"{city},{country_code}", "units": self.units, "appid": self.api_key}
-
+        self.load_location(city, country_code)
+        weather_url, parameters = self.long_forecast_request(city, country_code)
         weather_dictionary = self.get_weather_dictionary(weather_url, parameters)
+        self.remember_location(city, country_code, weather_dictionary)
+        return self.forecasts_from_dict(weather_dictionary, days)
 
-        city_timezone = weather_dictionary["city"]["timezone"]
-        city_name = weather_dictionary["city"]["name"]
-        country = pycountry.countries.get(alpha_2=weather_dictionary["city"]["country"]).name
-
-        weather_forecast = []
-        for index, day_forecast in enumerate(weather_dictionary["list"]):
-            one_day_forecast = OpenWeatherMapForecast.from_weather_dict(
-                self.transform_forecast_dict(day_forecast),
-                city_timezone,
-                city_name,
-                country,
-            )
-            weather_forecast.append(one_day_forecast)
-            if index == days:
-                break
-
-        return weather_forecast
+    async def get_long_weather_forecast_async(
+        self, city: str, country_code: str, days: int = 10
+    ) -> ForecastBatch:
+        """Async variant of get_long_weather_forecast."""
+        await self.load_location_async(city, country_code)
+        weather_url, parameters = self.long_forecast_request(city, country_code)
+        weather_dictionary = await self.get_weather_dictionary_async(weather_url, parameters)
+        await self.remember_location_async(city, country_code, weather_dictionary)
+        return self.forecasts_from_dict(weather_dictionary, days)
 
 
-def main() -> DayForecast | list[DayForecast]:
+def main() -> ForecastBatch:
     city: str = "camposampiero"
     country_code: str = "it"
     days: int = 10
@@ -0,0 +1,95 @@
+"""Ordered chain of weather providers with failover and hedged requests."""
+
+from typing import Any, Callable, Coroutine
+import asyncio
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    BaseWeatherClient,
+    ForecastBatch,
+)
+from weather_api.weather_requests.clients.weather_clients.latency import get_latency_tracker
+
+ProviderCall = Callable[[BaseWeatherClient], Coroutine[Any, Any, ForecastBatch]]
+
+
+class HedgedWeatherClient(BaseWeatherClient):
+    """Calls the first provider, if it has not answered within its latency budget
+    (its recent p95) or if it fails, calls the next one too and returns the first success.
+    Losers still running are cancelled.
+    """
+
+    def __init__(self, clients: list[BaseWeatherClient], hedge_delay: float = 1.0) -> None:
+        if not clients:
+            raise ValueError("At least one weather provider is needed.")
+        self.clients = clients
+        self.hedge_delay = hedge_delay
+
+    @property
+    def provider_name(self) -> str:
+        return ">".join(client.provider_name for client in self.clients)
+
+    @property
+    def max_forecast_days(self) -> int:  # type: ignore[override]
+        return min(client.max_forecast_days for client in self.clients)
+
+    def latency_budget(self, client: BaseWeatherClient) -> float:
+        p95 = get_latency_tracker(client.provider_name).percentile(95)
+        return self.hedge_delay if p95 is None else p95
+
+    def get_current_weather(self, city: str, country_code: str) -> ForecastBatch:
+        return self.failover(lambda client: client.get_current_weather(city, country_code))
+
+    def get_long_weather_forecast(
+        self, city: str, country_code: str, days: int = 10
+    ) -> ForecastBatch:
+        return self.failover(
+            lambda client: client.get_long_weather_forecast(city, country_code, days)
+        )
+
+    async def get_current_weather_async(self, city: str, country_code: str) -> ForecastBatch:
+        return await self.hedged(
+            lambda client: client.get_current_weather_async(city, country_code)
+        )
+
+    async def get_long_weather_forecast_async(
+        self, city: str, country_code: str, days: int = 10
+    ) -> ForecastBatch:
+        return await self.hedged(
+            lambda client: client.get_long_weather_forecast_async(city, country_code, days)
+        )
+
+    def failover(self, call: Callable[[BaseWeatherClient], ForecastBatch]) -> ForecastBatch:
+        """Blocking path: try the providers one after the other."""
+        errors: list[Exception] = []
+        for client in self.clients:
+            try:
+                return call(client)
+            except Exception as e:  # pylint: disable=broad-except
+                errors.append(e)
+        raise errors[0]
+
+    async def hedged(self, call: ProviderCall) -> ForecastBatch:
+        """Start providers in order, each after the budget of the previous one ran out."""
+        pending: set[asyncio.Task] = set()
+        errors: list[BaseException] = []
+        try:
+            for index, client in enumerate(self.clients):
+                pending.add(asyncio.create_task(call(client)))
+                is_last = index == len(self.clients) - 1
+                timeout = None if is_last else self.latency_budget(client)
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        break
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+                        errors.append(task.exception())  # type: ignore[arg-type]
+                    if not is_last:
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+        raise errors[0]
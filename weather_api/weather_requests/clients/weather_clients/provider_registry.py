@@ -0,0 +1,74 @@
+"""Weather clients built once at startup and shared by every request."""
+
+from fastapi import Request
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    BaseWeatherClient,
+)
+from weather_api.weather_requests.clients.weather_clients.http_transport import (
+    close_async_http_clients,
+    close_http_sessions,
+)
+from weather_api.weather_requests.clients.weather_clients.provider_chain import HedgedWeatherClient
+from weather_api.weather_requests.clients.weather_clients.weather_factory import (
+    ClientProvider,
+    get_weather_client,
+)
+
+
+class ProviderRegistry:
+    """One long lived client per provider, with the pooled transports they call through.
+
+    Which providers serve a request still comes from the config of the request,
+    so a reloaded config picks other clients of the registry.
+    """
+
+    def __init__(self, clients: dict[ClientProvider, BaseWeatherClient]) -> None:
+        self.clients = clients
+        self._chains: dict[tuple[tuple[ClientProvider, ...], float], BaseWeatherClient] = {}
+
+    @classmethod
+    def build(cls) -> "ProviderRegistry":
+        return cls({provider: get_weather_client(provider) for provider in ClientProvider})
+
+    def get(self, client_provider: ClientProvider) -> BaseWeatherClient:
+        try:
+            return self.clients[ClientProvider(client_provider)]
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"{client_provider} is not a valid provider.") from e
+
+    def chain(
+        self,
+        client_provider: ClientProvider,
+        fallback_providers: list[ClientProvider] | None = None,
+        hedge_delay: float = 1.0,
+    ) -> BaseWeatherClient:
+        """Return the client of the provider, hedged by the fallback providers in order."""
+        providers: list[ClientProvider] = []
+        for provider in [client_provider, *(fallback_providers or [])]:
+            self.get(provider)
+            if ClientProvider(provider) not in providers:
+                providers.append(ClientProvider(provider))
+        if len(providers) == 1:
+            return self.get(client_provider)
+        key = (tuple(providers), hedge_delay)
+        client = self._chains.get(key)
+        if client is None:
+            client = self._chains.setdefault(
+                key,
+                HedgedWeatherClient(
+                    [self.get(provider) for provider in providers], hedge_delay=hedge_delay
+                ),
+            )
+        return client
+
+    async def aclose(self) -> None:
+        """Close the pooled connections of the providers, on shutdown."""
+        self._chains.clear()
+        await close_async_http_clients()
+        close_http_sessions()
+
+
+def get_provider_registry(request: Request) -> ProviderRegistry:
+    """The registry built by the app lifespan."""
+    return request.app.state.weather_clients
@@ -0,0 +1,134 @@
+"""Token bucket rate limiting of provider calls, shared by every worker of a host."""
+
+from datetime import datetime, timezone
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+
+
+class SharedTokenBucket:
+    """Per minute token bucket plus a daily quota for one provider.
+
+    The state lives in a SQLite file and is updated in an immediate transaction,
+    so the limits hold across all gunicorn workers, not per process.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        provider: str,
+        per_minute: int,
+        per_day: int | None = None,
+        burst: int | None = None,
+    ) -> None:
+        self.path = path
+        self.provider = provider
+        self.rate = per_minute / 60
+        self.capacity = float(burst or per_minute)
+        self.per_day = per_day
+        self._local = threading.local()
+        self.connection().execute(
+            """CREATE TABLE IF NOT EXISTS token_buckets (
+                provider TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                day TEXT NOT NULL,
+                day_count INTEGER NOT NULL
+            )"""
+        )
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def _refill(self, row: tuple | None, now: float, today: str) -> tuple[float, int]:
+        if row is None:
+            return self.capacity, 0
+        tokens, updated_at, day, day_count = row
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+        return tokens, day_count if day == today else 0
+
+    def try_acquire(self) -> float:
+        """Take a token, return 0 on success or the seconds to wait before one is available."""
+        now = time.time()
+        today = datetime.now(timezone.utc).date().isoformat()
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated_at, day, day_count FROM token_buckets WHERE provider = ?",
+                (self.provider,),
+            ).fetchone()
+            tokens, day_count = self._refill(row, now, today)
+            if self.per_day is not None and day_count >= self.per_day:
+                wait = math.inf
+            elif tokens >= 1:
+                tokens -= 1
+                day_count += 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+            connection.execute(
+                "INSERT OR REPLACE INTO token_buckets VALUES (?, ?, ?, ?, ?)",
+                (self.provider, tokens, now, today, day_count),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return wait
+
+    def remaining(self) -> dict[str, float | None]:
+        """Report the budget left in the current minute and day."""
+        row = (
+            self.connection()
+            .execute(
+                "SELECT tokens, updated_at, day, day_count FROM token_buckets WHERE provider = ?",
+                (self.provider,),
+            )
+            .fetchone()
+        )
+        tokens, day_count = self._refill(
+            row, time.time(), datetime.now(timezone.utc).date().isoformat()
+        )
+        return {
+            "minute": math.floor(tokens),
+            "day": None if self.per_day is None else self.per_day - day_count,
+        }
+
+
+class RateLimiter:
+    """Shapes the calls to a provider, queueing them for at most max_wait seconds."""
+
+    def __init__(self, bucket: SharedTokenBucket, max_wait: float = 2.0) -> None:
+        self.bucket = bucket
+        self.max_wait = max_wait
+
+    def remaining(self) -> dict[str, float | None]:
+        return self.bucket.remaining()
+
+    async def acquire(self) -> bool:
+        """Wait for a token, False if none is available within max_wait."""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = await asyncio.to_thread(self.bucket.try_acquire)
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self) -> bool:
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = self.bucket.try_acquire()
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
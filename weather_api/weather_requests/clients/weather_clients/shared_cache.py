@@ -0,0 +1,211 @@
+"""Forecast cache shared by every worker process of a host, stored in a local SQLite file."""
+
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Awaitable, Callable
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+from loguru import logger
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    BaseWeatherClient,
+    ForecastBatch,
+)
+from weather_api.weather_requests.clients.weather_clients.location_cache import location_key
+
+_background_refreshes: dict[str, asyncio.Task] = {}
+
+
+def dump_forecasts(forecasts: ForecastBatch) -> str:
+    """Serialize a ForecastBatch to json, column by column."""
+    payload = asdict(forecasts)
+    payload["dates"] = [date.isoformat() for date in forecasts.dates]
+    if forecasts.retrieved_at:
+        payload["retrieved_at"] = forecasts.retrieved_at.isoformat()
+    return json.dumps(payload)
+
+
+def load_forecasts(payload: str) -> ForecastBatch:
+    """Deserialize json columns back to a ForecastBatch."""
+    forecasts = json.loads(payload)
+    forecasts["dates"] = [datetime.fromisoformat(date) for date in forecasts["dates"]]
+    if forecasts.get("retrieved_at"):
+        forecasts["retrieved_at"] = datetime.fromisoformat(forecasts["retrieved_at"])
+    return ForecastBatch(**forecasts)
+
+
+@dataclass
+class CachedForecasts:
+    forecasts: ForecastBatch
+    stored_at: float
+    expires_at: float
+
+    def is_fresh(self, now: float) -> bool:
+        return self.expires_at > now
+
+
+class SharedForecastCache:
+    """Key/value store of serialized forecasts with expiry.
+
+    SQLite in WAL mode lets many worker processes read while one writes,
+    each thread keeps its own connection.
+    """
+
+    purge_every = 100
+
+    def __init__(self, path: str, ttls: dict[str, float], stale_grace: float = 0) -> None:
+        self.path = path
+        self.ttls = ttls
+        self.stale_grace = stale_grace
+        self._local = threading.local()
+        self._writes = 0
+        connection = self.connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            """CREATE TABLE IF NOT EXISTS forecasts (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> ForecastBatch | None:
+        """Return the forecasts stored under key, None if missing or expired."""
+        entry = self.lookup(key)
+        if entry is None or not entry.is_fresh(time.time()):
+            return None
+        return entry.forecasts
+
+    def lookup(self, key: str) -> CachedForecasts | None:
+        """Return the entry stored under key, expired ones too while within the stale grace."""
+        row = (
+            self.connection()
+            .execute(
+                "SELECT payload, stored_at, expires_at FROM forecasts "
+                "WHERE key = ? AND expires_at > ?",
+                (key, time.time() - self.stale_grace),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return CachedForecasts(load_forecasts(row[0]), row[1], row[2])
+
+    def set(self, key: str, forecasts: ForecastBatch, kind: str) -> None:
+        """Store the forecasts with the TTL of their kind."""
+        ttl = self.ttls.get(kind, 0)
+        if ttl <= 0:
+            return
+        now = time.time()
+        connection = self.connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO forecasts (key, payload, stored_at, expires_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, dump_forecasts(forecasts), now, now + ttl),
+        )
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            connection.execute(
+                "DELETE FROM forecasts WHERE expires_at <= ?", (now - self.stale_grace,)
+            )
+
+
+class SharedCacheWeatherClient(BaseWeatherClient):
+    """Wraps a weather client, answering from the shared cache before calling the provider."""
+
+    def __init__(
+        self, client: BaseWeatherClient, cache: SharedForecastCache, provider: str
+    ) -> None:
+        self.client = client
+        self.cache = cache
+        self.provider = provider
+
+    @property
+    def provider_name(self) -> str:
+        return self.client.provider_name
+
+    @property
+    def max_forecast_days(self) -> int:  # type: ignore[override]
+        return self.client.max_forecast_days
+
+    def cache_key(self, kind: str, city: str, country_code: str) -> str:
+        return f"{self.provider}:{kind}:{location_key(city, country_code)}"
+
+    def get_current_weather(self, city: str, country_code: str) -> ForecastBatch:
+        key = self.cache_key("current", city, country_code)
+        forecasts = self.cache.get(key)
+        if forecasts is None:
+            forecasts = self.client.get_current_weather(city, country_code)
+            self.cache.set(key, forecasts, "current")
+        return forecasts
+
+    def get_long_weather_forecast(
+        self, city: str, country_code: str, days: int = 10
+    ) -> ForecastBatch:
+        key = self.cache_key("forecast", city, country_code)
+        forecasts = self.cache.get(key)
+        if forecasts is None:
+            forecasts = self.client.get_long_weather_forecast(
+                city, country_code, self.max_forecast_days
+            )
+            self.cache.set(key, forecasts, "forecast")
+        return forecasts[:days]
+
+    async def get_current_weather_async(self, city: str, country_code: str) -> ForecastBatch:
+        return await self.cached_call(
+            self.cache_key("current", city, country_code),
+            "current",
+            lambda: self.client.get_current_weather_async(city, country_code),
+        )
+
+    async def get_long_weather_forecast_async(
+        self, city: str, country_code: str, days: int = 10
+    ) -> ForecastBatch:
+        forecasts = await self.cached_call(
+            self.cache_key("forecast", city, country_code),
+            "forecast",
+            lambda: self.client.get_long_weather_forecast_async(
+                city, country_code, self.max_forecast_days
+            ),
+        )
+        return forecasts[:days]
+
+    async def cached_call(
+        self, key: str, kind: str, call: Callable[[], Awaitable[ForecastBatch]]
+    ) -> ForecastBatch:
+        """Serve fresh entries, serve stale ones while refreshing them in background,
+        call the provider otherwise."""
+        entry = await asyncio.to_thread(self.cache.lookup, key)
+        if entry is not None:
+            if not entry.is_fresh(time.time()) and key not in _background_refreshes:
+                task = asyncio.create_task(self.refresh(key, kind, call))
+                _background_refreshes[key] = task
+                task.add_done_callback(lambda _: _background_refreshes.pop(key, None))
+            return entry.forecasts
+
+        forecasts = await call()
+        await asyncio.to_thread(self.cache.set, key, forecasts, kind)
+        return forecasts
+
+    async def refresh(
+        self, key: str, kind: str, call: Callable[[], Awaitable[ForecastBatch]]
+    ) -> None:
+        try:
+            forecasts = await call()
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Background refresh of {} failed, keeping stale entry: {}", key, e)
+            return
+        await asyncio.to_thread(self.cache.set, key, forecasts, kind)
@@ -1,12 +1,27 @@
 """Factory for clients for api weather requests."""
 
 from enum import Enum
+from functools import cache
 import os
 
 from weather_api.weather_requests.clients.weather_clients import (
     openweathermap_client,
     weatherapi_client,
 )
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    BaseWeatherClient,
+)
+from weather_api.weather_requests.clients.weather_clients.circuit_breaker import CircuitBreaker
+from weather_api.weather_requests.clients.weather_clients.location_cache import LocationCache
+from weather_api.weather_requests.clients.weather_clients.rate_limiter import (
+    RateLimiter,
+    SharedTokenBucket,
+)
+from weather_api.weather_requests.clients.weather_clients.response_cache import ResponseCache
+from weather_api.weather_requests.clients.weather_clients.shared_cache import (
+    SharedCacheWeatherClient,
+    SharedForecastCache,
+)
 import weather_api.config as config
 
 
@@ -15,21 +30,112 @@ class ClientProvider(str, Enum):
     WEATHERAPI = "weatherapi"
 
 
+@cache
+def get_response_cache() -> ResponseCache:
+    """Return the provider response cache shared by every client of this process."""
+    app_config = config.load_config()
+    return ResponseCache(
+        ttls={
+            "current": app_config.cache_ttl_current,
+            "forecast": app_config.cache_ttl_forecast,
+        },
+        max_entries=app_config.cache_max_entries,
+        max_bytes=app_config.cache_max_bytes,
+    )
+
+
+@cache
+def get_location_cache() -> LocationCache:
+    """Return the resolved location cache, persisted to disk when a path is configured."""
+    app_config = config.load_config()
+    return LocationCache(
+        app_config.location_cache_path, max_entries=app_config.location_cache_max_entries
+    )
+
+
+@cache
+def get_circuit_breaker(client_provider: ClientProvider) -> CircuitBreaker:
+    """Return the circuit breaker of the provider, shared by every client of this process."""
+    app_config = config.load_config()
+    return CircuitBreaker(
+        failure_threshold=app_config.breaker_failure_threshold,
+        min_calls=app_config.breaker_min_calls,
+        reset_timeout=app_config.breaker_reset_timeout,
+        slow_call_duration=app_config.breaker_slow_call_duration,
+    )
+
+
+@cache
+def get_rate_limiter(client_provider: ClientProvider) -> RateLimiter | None:
+    """Return the rate limiter of the provider, if limits are configured for it."""
+    app_config = config.load_config()
+    limits = app_config.rate_limits.get(ClientProvider(client_provider).value)
+    if not app_config.rate_limit_path or limits is None:
+        return None
+    bucket = SharedTokenBucket(
+        app_config.rate_limit_path,
+        ClientProvider(client_provider).value,
+        per_minute=limits.per_minute,
+        per_day=limits.per_day,
+        burst=limits.burst,
+    )
+    return RateLimiter(bucket, max_wait=app_config.rate_limit_max_wait)
+
+
+@cache
+def get_shared_forecast_cache() -> SharedForecastCache | None:
+    """Return the forecast cache shared by the workers of this host, if configured."""
+    app_config = config.load_config()
+    if not app_config.shared_cache_path:
+        return None
+    return SharedForecastCache(
+        app_config.shared_cache_path,
+        ttls={
+            "current": app_config.cache_ttl_current,
+            "forecast": app_config.cache_ttl_forecast,
+        },
+        stale_grace=app_config.cache_stale_grace,
+    )
+
+
 def get_weather_client(
     client_provider: ClientProvider = ClientProvider.WEATHERAPI,
-) -> openweathermap_client.OpenWeatherMapClient | weatherapi_client.WeatherAPIClient:
-    """Return client depending on api provider"""
+) -> BaseWeatherClient:
+    """Return client depending on api provider,
+    behind the shared forecast cache when one is configured."""
+    client: BaseWeatherClient
     if client_provider == ClientProvider.OPENWEATHER:
+        app_config = config.load_config()
         configuration = openweathermap_client.ForecastClientConfig(
-            os.getenv(config.load_config().openweather_api_key)
+            os.getenv(app_config.openweather_api_key),
+            connect_timeout=app_config.connect_timeout,
+            read_timeout=app_config.read_timeout,
+            min_read_timeout=app_config.min_read_timeout,
+            response_cache=get_response_cache(),
+            circuit_breaker=get_circuit_breaker(ClientProvider.OPENWEATHER),
+            rate_limiter=get_rate_limiter(ClientProvider.OPENWEATHER),
+            location_cache=get_location_cache(),
         )
-        return openweathermap_client.OpenWeatherMapClient(configuration)
+        client = openweathermap_client.OpenWeatherMapClient(configuration)
 
     elif client_provider == ClientProvider.WEATHERAPI:
+        app_config = config.load_config()
         configuration = weatherapi_client.ForecastClientConfig(
-            os.getenv(config.load_config().weather_api_com_key)
+            os.getenv(app_config.weather_api_com_key),
+            connect_timeout=app_config.connect_timeout,
+            read_timeout=app_config.read_timeout,
+            min_read_timeout=app_config.min_read_timeout,
+            response_cache=get_response_cache(),
+            circuit_breaker=get_circuit_breaker(ClientProvider.WEATHERAPI),
+            rate_limiter=get_rate_limiter(ClientProvider.WEATHERAPI),
+            location_cache=get_location_cache(),
         )
-        return weatherapi_client.WeatherAPIClient(configuration)
+        client = weatherapi_client.WeatherAPIClient(configuration)
 
     else:
         raise ValueError(f"{client_provider} is not a valid provider.")
+
+    shared_cache = get_shared_forecast_cache()
+    if shared_cache is None:
+        return client
+    return SharedCacheWeatherClient(client, shared_cache, ClientProvider(client_provider).value)
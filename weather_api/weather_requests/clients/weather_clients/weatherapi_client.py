@@ -1,146 +1,158 @@
 """WEATHERAPI client to get weather today for given city"""
 
-from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Any
 import os
 
+import httpx
 import pytz
+import requests
 
 from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
     BadApiException,
     BadCityException,
     BaseWeatherClient,
     CallEndpointMixin,
-    DayForecast,
+    ForecastBatch,
     ForecastClientConfig,
 )
 
 
-@dataclass
-class WeatherApiDayForecast(DayForecast):
-    @classmethod
-    def from_weather_dict(
-        cls,
-        weather_dictionary: dict,
-        city_timezone: int,
-        city_name: str,
-        country_name: str,
-    ) -> "DayForecast":
-        """First changes times from UTC to local, then populates DayForecast"""
-
-        utc_date = weather_dictionary["location"]["localtime_epoch"]
-        local_date = datetime.utcfromtimestamp(utc_date)
-        local_date = local_date.replace(tzinfo=timezone(timedelta(seconds=city_timezone)))
-        weather_forecast = cls(
-            date=local_date,
-            temperature=weather_dictionary["current"]["temp_c"],
-            weather_conditions=weather_dictionary["current"]["condition"]["text"],
-            wind_speed=weather_dictionary["current"]["wind_kph"],
-            humidity=weather_dictionary["current"]["humidity"],
-            city_name=city_name,
-            country=country_name,
-        )
-        return weather_forecast
+@lru_cache(maxsize=None)
+def city_timezone(tz_id: str) -> pytz.BaseTzInfo:
+    """Build each timezone once, instead of on every provider answer."""
+    return pytz.timezone(tz_id)
 
 
 class WeatherAPIClient(BaseWeatherClient, CallEndpointMixin):
     """Client to get current weather, current or forecast."""
 
     base_url = "http://api.weatherapi.com/v1"
+    endpoint_kinds = {"current.json": "current", "forecast.json": "forecast"}
+    max_forecast_days = 14
 
-    def get_weather_dictionary(self, weather_url: str, parameters: dict) -> dict:
-        """Helper to call the endpoint and extract values for both now and long forecast."""
-
-        response = self.call_endpoint(weather_url, parameters)
+    def parse_weather_response(
+        self, response: requests.Response | httpx.Response, parameters: dict
+    ) -> dict:
+        """Check the status of the provider response and select the forecast fields."""
         if response.status_code == 400:
             raise BadCityException(f"{parameters['q']} does not match any location.")
-        elif response.status_code == 403:
+        elif response.status_code in (401, 403):
             raise BadApiException(
                 f"""Failure core: {response.status_code}. {response.json()['error']['message']} 
                 Please check https://www.weatherapi.com/api-explorer.aspx#forecast for more info"""
             )
 
-        weather_dictionary = response.json()
-
-        city_tz = pytz.timezone(weather_dictionary["location"]["tz_id"])
+        return self.select_fields(self.decode_json(response))
 
-        return_dictionary = {
-            "weather_dictionary": weather_dictionary,
-            "city_timezone": int(city_tz.utcoffset(datetime.now()).total_seconds()),
-            "city_name": weather_dictionary["location"]["name"],
-            "country": weather_dictionary["location"]["country"],
+    @staticmethod
+    def select_fields(payload: dict) -> dict:
+        """Keep the fields of the current or forecast json that DayForecast needs,
+        dropping the hourly blocks of every forecast day."""
+        location = payload["location"]
+        if "forecast" in payload:
+            days = [
+                {
+                    "dt": day_forecast["date_epoch"],
+                    "temperature": day_forecast["day"]["avgtemp_c"],
+                    "weather_conditions": day_forecast["day"]["condition"]["text"],
+                    "wind_speed": day_forecast["day"]["maxwind_kph"],
+                    "humidity": day_forecast["day"]["avghumidity"],
+                }
+                for day_forecast in payload["forecast"]["forecastday"]
+            ]
+        else:
+            days = [
+                {
+                    "dt": location["localtime_epoch"],
+                    "temperature": payload["current"]["temp_c"],
+                    "weather_conditions": payload["current"]["condition"]["text"],
+                    "wind_speed": payload["current"]["wind_kph"],
+                    "humidity": payload["current"]["humidity"],
+                }
+            ]
+        utc_offset = city_timezone(location["tz_id"]).utcoffset(datetime.now()) or timedelta()
+        return {
+            "city_name": location["name"],
+            "country": location["country"],
+            "city_timezone": int(utc_offset.total_seconds()),
+            "latitude": location.get("lat"),
+            "longitude": location.get("lon"),
+            "tz_id": location["tz_id"],
+            "days": days,
         }
-        return return_dictionary
+
+    def current_weather_request(self, city: str, country_code: str) -> tuple[str, dict]:
+        """Build url and parameters for the current weather endpoint."""
+        endpoint = "current.json"
+        weather_url = self.build_url(self.base_url, endpoint)
+        parameters = {"key": self.api_key, **self.location_query(city, country_code)}
+        return weather_url, parameters
 
     def get_current_weather(
         self,
         city: str,
         country_code: str,
-    ) -> list[DayForecast]:
+    ) -> ForecastBatch:
         """First builds the url and call the endpoints, which returns a dict
         then sends the dict to dataclass to have today's weather"""
-        endpoint = "current.json"
-        weather_url = self.build_url(self.base_url, endpoint)
-        parameters = {"key": self.api_key, "q": f"{city},{country_code}"}
-
+        self.load_location(city, country_code)
+        weather_url, parameters = self.current_weather_request(city, country_code)
         weather_dictionary = self.get_weather_dictionary(weather_url, parameters)
+        self.remember_location(city, country_code, weather_dictionary)
+        return self.forecasts_from_dict(weather_dictionary)
 
-        day = WeatherApiDayForecast.from_weather_dict(
-            weather_dictionary["weather_dictionary"],
-            weather_dictionary["city_timezone"],
-            weather_dictionary["city_name"],
-            weather_dictionary["country"],
-        )
-        weather_forecast = []
-        weather_forecast.append(day)
-        return weather_forecast
-
-    @staticmethod
-    def transform_forecast_dict(day_forecast: dict) -> dict:
-        """Transform the forecast json into a dictionary that can be sent to from_weather_dict."""
-        one_day_forecast = {}
-        one_day_forecast["location"] = {"localtime_epoch": day_forecast["date_epoch"]}
-        one_day_forecast["current"] = {
-            "temp_c": day_forecast["day"]["avgtemp_c"],
-            "condition": {"text": day_forecast["day"]["condition"]["text"]},
-            "wind_kph": day_forecast["day"]["avgvis_km"],
-            "humidity": day_forecast["day"]["avghumidity"],
-        }
-        return one_day_forecast
-
-    def get_long_weather_forecast(
+    async def get_current_weather_async(
         self,
         city: str,
         country_code: str,
-        days: int = 10,
-    ) -> list[DayForecast]:
-        """First builds the url and call the endpoints, which returns a dict
-        then sends the dict to dataclass to have today's weather"""
+    ) -> ForecastBatch:
+        """Async variant of get_current_weather."""
+        await self.load_location_async(city, country_code)
+        weather_url, parameters = self.current_weather_request(city, country_code)
+        weather_dictionary = await self.get_weather_dictionary_async(weather_url, parameters)
+        await self.remember_location_async(city, country_code, weather_dictionary)
+        return self.forecasts_from_dict(weather_dictionary)
+
+    def long_forecast_request(self, city: str, country_code: str) -> tuple[str, dict]:
+        """Build url and parameters for the forecast endpoint, always for the longest horizon
+        so that every shorter request is answered from the same cached response."""
         endpoint = "forecast.json"
         weather_url = self.build_url(self.base_url, endpoint)
         parameters = {
             "key": self.api_key,
-            "q": f"{city},{country_code}",
-            "days": days,
+            **self.location_query(city, country_code),
+            "days": self.max_forecast_days,
         }
+        return weather_url, parameters
 
+    def get_long_weather_forecast(
+        self,
+        city: str,
+        country_code: str,
+        days: int = 10,
+    ) -> ForecastBatch:
+        """First builds the url and call the endpoints, which returns a dict
+        then sends the dict to dataclass to have today's weather"""
+        self.load_location(city, country_code)
+        weather_url, parameters = self.long_forecast_request(city, country_code)
         weather_dictionary = self.get_weather_dictionary(weather_url, parameters)
+        self.remember_location(city, country_code, weather_dictionary)
+        return self.forecasts_from_dict(weather_dictionary, days)
 
-        weather_forecast = []
-        for index, day_forecast in enumerate(
-            weather_dictionary["weather_dictionary"]["forecast"]["forecastday"]
-        ):
-            one_day_forecast = WeatherApiDayForecast.from_weather_dict(
-                self.transform_forecast_dict(day_forecast),
-                weather_dictionary["city_timezone"],
-                weather_dictionary["city_name"],
-                weather_dictionary["country"],
-            )
-            weather_forecast.append(one_day_forecast)
-            if index == days:
-                break
-        return weather_forecast
+    async def get_long_weather_forecast_async(
+        self,
+        city: str,
+        country_code: str,
+        days: int = 10,
+    ) -> ForecastBatch:
+        """Async variant of get_long_weather_forecast."""
+        await self.load_location_async(city, country_code)
+        weather_url, parameters = self.long_forecast_request(city, country_code)
+        weather_dictionary = await self.get_weather_dictionary_async(weather_url, parameters)
+        await self.remember_location_async(city, country_code, weather_dictionary)
+        return self.forecasts_from_dict(weather_dictionary, days)
 
 
 def main():
@@ -0,0 +1,201 @@
+"""Accept header negotiation and the NDJSON, MessagePack and Arrow IPC encoders.
+
+Every format carries the fields of WeatherResponseSchema, JSON stays the default.
+Arrow needs the optional pyarrow package and is only offered when it is installed.
+"""
+
+from datetime import datetime
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+import io
+import itertools
+
+import msgpack  # type: ignore[import-untyped]
+import orjson
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+from weather_api.weather_requests.schemas import BatchWeatherResponseSchema
+from weather_api.weather_requests.serialization import response_rows
+
+if TYPE_CHECKING:
+    import pyarrow  # type: ignore[import-untyped]
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+ALIASES = {
+    "application/jsonl": NDJSON,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+
+
+class NotAcceptable(Exception):
+    pass
+
+
+def available_media_types() -> tuple[str, ...]:
+    if find_spec("pyarrow") is None:
+        return (JSON, NDJSON, MSGPACK)
+    return (JSON, NDJSON, MSGPACK, ARROW)
+
+
+def negotiate(accept: str | None) -> str:
+    """Pick the media type with the highest quality in the Accept header, JSON by default."""
+    if not accept:
+        return JSON
+    supported = available_media_types()
+    ranges = []
+    for position, media_range in enumerate(accept.split(",")):
+        media_type, *parameters = [part.strip() for part in media_range.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append(
+                (-quality, position, ALIASES.get(media_type.lower(), media_type.lower()))
+            )
+    for _, _, media_type in sorted(ranges):
+        if media_type in ("*/*", "application/*"):
+            return JSON
+        if media_type in supported:
+            return media_type
+    raise NotAcceptable(f"Supported media types are {', '.join(supported)}.")
+
+
+def isoformat(date: datetime) -> str:
+    """Format dates like the JSON responses do."""
+    return orjson.dumps(date, option=orjson.OPT_UTC_Z)[1:-1].decode()
+
+
+def encode_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return isoformat(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def ndjson_lines(rows: Iterable[dict]) -> Iterator[bytes]:
+    for row in rows:
+        yield orjson.dumps(row, option=orjson.OPT_UTC_Z | orjson.OPT_APPEND_NEWLINE)
+
+
+def pack(rows: Iterable[dict]) -> bytes:
+    """MessagePack array of the rows."""
+    return msgpack.packb(list(rows), default=encode_default)
+
+
+def arrow_schema(batch_items: bool = False) -> "pyarrow.Schema":
+    import pyarrow  # pylint: disable=import-outside-toplevel
+
+    fields = [
+        ("date", pyarrow.timestamp("us", tz="UTC")),
+        ("weather_conditions", pyarrow.string()),
+        ("temperature", pyarrow.float64()),
+        ("wind_speed", pyarrow.float64()),
+        ("humidity", pyarrow.float64()),
+        ("city_name", pyarrow.string()),
+        ("country", pyarrow.string()),
+    ]
+    if batch_items:
+        fields += [
+            ("requested_country_code", pyarrow.string()),
+            ("requested_city_name", pyarrow.string()),
+            ("status_code", pyarrow.int16()),
+            ("error", pyarrow.string()),
+        ]
+    return pyarrow.schema(fields)
+
+
+def arrow_record_batch(
+    forecasts: ForecastBatch, schema: "pyarrow.Schema", item: dict | None = None
+) -> "pyarrow.RecordBatch":
+    """Columns of the forecasts, with the request columns of a batch item repeated."""
+    import pyarrow  # pylint: disable=import-outside-toplevel
+
+    size = len(forecasts)
+    columns: dict[str, list] = {
+        "date": forecasts.dates,
+        "weather_conditions": forecasts.weather_conditions,
+        "temperature": forecasts.temperatures,
+        "wind_speed": forecasts.wind_speeds,
+        "humidity": forecasts.humidities,
+        "city_name": [forecasts.city_name] * size,
+        "country": [forecasts.country] * size,
+    }
+    if item is not None:
+        if not size:
+            # A failed city still gets a row, with its error and no forecast.
+            size = 1
+            columns = {name: [None] for name in columns}
+        columns.update({name: [value] * size for name, value in item.items()})
+    return pyarrow.record_batch(
+        [pyarrow.array(columns[field.name], type=field.type) for field in schema],
+        schema=schema,
+    )
+
+
+def arrow_stream(batches: Iterable[tuple[ForecastBatch, dict | None]]) -> Iterator[bytes]:
+    """Write an Arrow IPC stream, yielding the bytes of each record batch once written.
+    The batches are consumed one at a time, never all at once."""
+    import pyarrow  # pylint: disable=import-outside-toplevel
+
+    batches = iter(batches)
+    first = next(batches, None)
+    schema = arrow_schema(batch_items=first is not None and first[1] is not None)
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        for forecasts, item in itertools.chain([first], batches) if first is not None else []:
+            writer.write_batch(arrow_record_batch(forecasts, schema, item))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+def encode_forecasts(forecasts: ForecastBatch, media_type: str) -> bytes:
+    """Encode the forecasts of one city in a media type other than JSON."""
+    if media_type == NDJSON:
+        return b"".join(ndjson_lines(response_rows(forecasts)))
+    if media_type == MSGPACK:
+        return pack(response_rows(forecasts))
+    if media_type == ARROW:
+        return b"".join(arrow_stream([(forecasts, None)]))
+    raise NotAcceptable(f"{media_type} is not supported.")
+
+
+def batch_item_row(item: BatchWeatherResponseSchema) -> dict:
+    return item.model_dump()
+
+
+def batch_forecasts(item: BatchWeatherResponseSchema) -> ForecastBatch:
+    return ForecastBatch.of(item.forecasts)
+
+
+def encode_batch(items: list[BatchWeatherResponseSchema], media_type: str) -> Iterator[bytes]:
+    """Encode the items of a batch request, NDJSON and Arrow city by city as they are sent.
+    The items are all gathered before, in the order of the request."""
+    if media_type == NDJSON:
+        return ndjson_lines(batch_item_row(item) for item in items)
+    if media_type == MSGPACK:
+        return iter([pack(batch_item_row(item) for item in items)])
+    if media_type == ARROW:
+        return arrow_stream(
+            (
+                batch_forecasts(item),
+                {
+                    "requested_country_code": item.country_code,
+                    "requested_city_name": item.city_name,
+                    "status_code": item.status_code,
+                    "error": item.error,
+                },
+            )
+            for item in items
+        )
+    raise NotAcceptable(f"{media_type} is not supported.")
@@ -1,19 +1,118 @@
 """Endpoints for current and forecast weather."""
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from weather_api.config import load_config
 from weather_api.weather_requests import service_handler
+from weather_api.weather_requests.clients.storage_clients.storage_clients import StorageClient
 from weather_api.weather_requests.clients.storage_clients.storage_factory import get_storage_client
 from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
     BadApiException,
     BadCityException,
+    BaseWeatherClient,
+    CircuitOpenException,
+    ForecastBatch,
+    RateLimitException,
 )
-from weather_api.weather_requests.clients.weather_clients.weather_factory import get_weather_client
-from weather_api.weather_requests.schemas import WeatherResponseSchema
+from weather_api.weather_requests.clients.weather_clients.provider_registry import (
+    ProviderRegistry,
+    get_provider_registry,
+)
+from weather_api.weather_requests.response_formats import (
+    JSON,
+    NotAcceptable,
+    encode_batch,
+    encode_forecasts,
+    negotiate,
+)
+from weather_api.weather_requests.schemas import (
+    BatchWeatherResponseSchema,
+    CityRequestSchema,
+    WeatherResponseSchema,
+)
+from weather_api.weather_requests.serialization import (
+    SerializedResponse,
+    etag_matches,
+    serialized_forecasts,
+)
+from weather_api.weather_requests.weather_db_engine import get_async_session, get_session
+from weather_api.weather_requests.write_behind import WriteBehindQueue
 
 weather_router = APIRouter()
 
+# Longest forecast any provider returns, the providers configured may return fewer days.
+MAX_FORECAST_DAYS = 16
+
+
+def get_storage(
+    request: Request,
+    config=Depends(load_config),
+    session: Session | None = Depends(get_session),
+    async_session: AsyncSession | None = Depends(get_async_session),
+) -> StorageClient | WriteBehindQueue:
+    """Storage client of the request, on the request scoped database session.
+    The write-behind queue instead, when it is enabled."""
+    write_behind = getattr(request.app.state, "write_behind", None)
+    if write_behind is not None:
+        return write_behind
+    try:
+        return get_storage_client(config.storage_type, session, async_session)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        ) from e
+
+
+def media_type_of(accept: str | None) -> str:
+    try:
+        return negotiate(accept)
+    except NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e)) from e
+
+
+def forecasts_response(
+    forecasts: ForecastBatch,
+    ttl: float,
+    if_none_match: str | None = None,
+    media_type: str = JSON,
+) -> Response:
+    """Response written straight from the forecasts in the negotiated media type.
+    response_model only documents the JSON shape, the trusted data is not validated again.
+
+    Caches may keep the response until the provider data is ttl seconds old,
+    max-age counts from the provider answer since the Age header is sent with it.
+    They revalidate it with its ETag, answered by a 304 without body.
+    """
+    if media_type == JSON:
+        serialized = serialized_forecasts.serialize(forecasts)
+    else:
+        serialized = SerializedResponse.of(encode_forecasts(forecasts, media_type))
+    age = service_handler.data_age(forecasts)
+    headers = {
+        "Age": str(age),
+        "Cache-Control": f"public, max-age={int(ttl)}",
+        "ETag": serialized.etag,
+        "Vary": "Accept",
+    }
+    if etag_matches(if_none_match, serialized.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=serialized.content, media_type=media_type, headers=headers)
+
+
+def batch_response(
+    items: list[BatchWeatherResponseSchema], media_type: str
+) -> list[BatchWeatherResponseSchema] | Response:
+    """JSON items are left to response_model, the other media types are streamed city by city."""
+    if media_type == JSON:
+        return items
+    return StreamingResponse(
+        encode_batch(items, media_type), media_type=media_type, headers={"Vary": "Accept"}
+    )
+
 
 @weather_router.get(
     "/weather-now/{country_code}/{city_name}",
@@ -24,31 +123,38 @@ weather_router = APIRouter()
 async def weathernow(
     city_name: str,
     country_code: str,
-    config=load_config(),
-) -> list[WeatherResponseSchema]:
+    if_none_match: str | None = Header(default=None),
+    accept: str | None = Header(default=None),
+    storage_client: StorageClient | WriteBehindQueue = Depends(get_storage),
+    weather_clients: ProviderRegistry = Depends(get_provider_registry),
+    config=Depends(load_config),
+) -> Response:
     """Expect a city name in the url and 2 letters country code as a url parameter.
     returns the weather results from selected weather client."""
+    media_type = media_type_of(accept)
     try:
-        client = get_weather_client(config.weather_now_provider)
-    except ValueError as e:
-        raise HTTPException(
-            status_code=400,
-            detail=str(e),
+        client = weather_clients.chain(
+            config.weather_now_provider,
+            config.weather_now_fallback_providers,
+            config.hedge_delay,
         )
-    try:
-        storage_client = get_storage_client(config.storage_type)
     except ValueError as e:
         raise HTTPException(
             status_code=400,
             detail=str(e),
-        )
+        ) from e
 
     try:
-        return service_handler.get_request_helper(client, city_name, country_code, storage_client)
+        forecasts = await service_handler.get_request_helper(
+            client, city_name, country_code, storage_client
+        )
     except (AttributeError, BadCityException, IndexError, service_handler.NonexistentCountry) as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except (CircuitOpenException, RateLimitException) as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except BadApiException as e:
-        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}") from e
+    return forecasts_response(forecasts, config.cache_ttl_current, if_none_match, media_type)
 
 
 @weather_router.get(
@@ -60,31 +166,125 @@ async def weathernow(
 async def weather_forecast(
     city_name: str,
     country_code: str,
-    days: int = 10,
-    config=load_config(),
-) -> list[WeatherResponseSchema]:
+    days: int = Query(default=10, ge=1, le=MAX_FORECAST_DAYS),
+    if_none_match: str | None = Header(default=None),
+    accept: str | None = Header(default=None),
+    storage_client: StorageClient | WriteBehindQueue = Depends(get_storage),
+    weather_clients: ProviderRegistry = Depends(get_provider_registry),
+    config=Depends(load_config),
+) -> Response:
     """Expect a city name in the url,
     2 letters country code and days of forecast as a url parameter.
     returns weather forecast in a list from selected weather client."""
+    media_type = media_type_of(accept)
     try:
-        client = get_weather_client(config.weather_forecast_provider)
+        client = weather_clients.chain(
+            config.weather_forecast_provider,
+            config.weather_forecast_fallback_providers,
+            config.hedge_delay,
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=400,
             detail=str(e),
+        ) from e
+    check_forecast_days(client, days)
+    try:
+        forecasts = await service_handler.get_request_helper(
+            client, city_name, country_code, storage_client, days
         )
+    except (AttributeError, BadCityException, IndexError, service_handler.NonexistentCountry) as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except (CircuitOpenException, RateLimitException) as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    except BadApiException as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}") from e
+    return forecasts_response(forecasts, config.cache_ttl_forecast, if_none_match, media_type)
+
+
+def check_forecast_days(client: BaseWeatherClient, days: int) -> None:
+    """The providers of the chain answer at most max_forecast_days days."""
+    if days > client.max_forecast_days:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {client.max_forecast_days} days of forecast can be requested.",
+        )
+
+
+def check_batch_size(cities: list[CityRequestSchema], max_cities: int) -> None:
+    if len(cities) > max_cities:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {max_cities} cities can be requested in one batch.",
+        )
+
+
+@weather_router.post(
+    "/weather-now/batch",
+    response_model=list[BatchWeatherResponseSchema],
+    status_code=status.HTTP_200_OK,
+    tags=["weather_requests"],
+)
+async def weathernow_batch(
+    cities: list[CityRequestSchema],
+    accept: str | None = Header(default=None),
+    storage_client: StorageClient | WriteBehindQueue = Depends(get_storage),
+    weather_clients: ProviderRegistry = Depends(get_provider_registry),
+    config=Depends(load_config),
+) -> list[BatchWeatherResponseSchema] | Response:
+    """Expect a list of country code and city name pairs in the body.
+    returns the weather results of each city, with an error for the cities that failed."""
+    media_type = media_type_of(accept)
+    check_batch_size(cities, config.batch_max_cities)
     try:
-        storage_client = get_storage_client(config.storage_type)
+        client = weather_clients.chain(
+            config.weather_now_provider,
+            config.weather_now_fallback_providers,
+            config.hedge_delay,
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=400,
             detail=str(e),
-        )
+        ) from e
+    items = await service_handler.batch_request_helper(
+        client, cities, storage_client, concurrency=config.batch_concurrency
+    )
+    return batch_response(items, media_type)
+
+
+@weather_router.post(
+    "/weather-forecast/batch",
+    response_model=list[BatchWeatherResponseSchema],
+    status_code=status.HTTP_200_OK,
+    tags=["weather_requests"],
+)
+async def weather_forecast_batch(
+    cities: list[CityRequestSchema],
+    days: int = Query(default=10, ge=1, le=MAX_FORECAST_DAYS),
+    accept: str | None = Header(default=None),
+    storage_client: StorageClient | WriteBehindQueue = Depends(get_storage),
+    weather_clients: ProviderRegistry = Depends(get_provider_registry),
+    config=Depends(load_config),
+) -> list[BatchWeatherResponseSchema] | Response:
+    """Expect a list of country code and city name pairs in the body,
+    days of forecast as a url parameter.
+    returns the weather forecast of each city, with an error for the cities that failed."""
+    media_type = media_type_of(accept)
+    check_batch_size(cities, config.batch_max_cities)
     try:
-        return service_handler.get_request_helper(
-            client, city_name, country_code, storage_client, days
+        client = weather_clients.chain(
+            config.weather_forecast_provider,
+            config.weather_forecast_fallback_providers,
+            config.hedge_delay,
         )
-    except (AttributeError, BadCityException, IndexError, service_handler.NonexistentCountry) as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except BadApiException as e:
-        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        ) from e
+    check_forecast_days(client, days)
+    items = await service_handler.batch_request_helper(
+        client, cities, storage_client, days, concurrency=config.batch_concurrency
+    )
+    return batch_response(items, media_type)
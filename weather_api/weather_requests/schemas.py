@@ -11,3 +11,16 @@ class WeatherResponseSchema(BaseModel):
     humidity: float
     city_name: str
     country: str
+
+
+class CityRequestSchema(BaseModel):
+    country_code: str
+    city_name: str
+
+
+class BatchWeatherResponseSchema(BaseModel):
+    country_code: str
+    city_name: str
+    status_code: int
+    forecasts: list[WeatherResponseSchema] = []
+    error: str | None = None
@@ -0,0 +1,99 @@
+"""JSON serialization of forecasts straight from ForecastBatch, without pydantic."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator
+import hashlib
+import threading
+
+import orjson
+
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+
+
+def response_rows(forecasts: ForecastBatch) -> Iterator[dict]:
+    """Yield the forecasts as dicts in the shape of WeatherResponseSchema."""
+    for date, temperature, weather_conditions, wind_speed, humidity in zip(
+        forecasts.dates,
+        forecasts.temperatures,
+        forecasts.weather_conditions,
+        forecasts.wind_speeds,
+        forecasts.humidities,
+    ):
+        yield {
+            "date": date,
+            "weather_conditions": weather_conditions,
+            "temperature": float(temperature),
+            "wind_speed": float(wind_speed),
+            "humidity": float(humidity),
+            "city_name": forecasts.city_name,
+            "country": forecasts.country,
+        }
+
+
+def dump_rows(forecasts: ForecastBatch) -> bytes:
+    """Serialize the forecasts in the shape of list[WeatherResponseSchema]."""
+    return orjson.dumps(list(response_rows(forecasts)), option=orjson.OPT_UTC_Z)
+
+
+@dataclass(frozen=True)
+class SerializedResponse:
+    content: bytes
+    etag: str
+
+    @classmethod
+    def of(cls, content: bytes) -> "SerializedResponse":
+        """Pair the content with its strong ETag, a hash of the bytes."""
+        return cls(content, f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"')
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header with the ETag, as RFC 9110 asks."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return etag in candidates
+
+
+class SerializedForecasts:
+    """Bounded LRU of serialized forecasts and their ETag.
+
+    A provider answer is identified by its city, country and retrieval time,
+    so every request served from the same cached answer reuses the same bytes.
+    """
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[
+            tuple[str, str, datetime, int], SerializedResponse
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def dumps(self, forecasts: ForecastBatch) -> bytes:
+        """JSON body of the forecasts, from the cache when already serialized."""
+        return self.serialize(forecasts).content
+
+    def serialize(self, forecasts: ForecastBatch) -> SerializedResponse:
+        if forecasts.retrieved_at is None:
+            return SerializedResponse.of(dump_rows(forecasts))
+        key = (forecasts.city_name, forecasts.country, forecasts.retrieved_at, len(forecasts))
+        with self._lock:
+            serialized = self._entries.get(key)
+            if serialized is not None:
+                self._entries.move_to_end(key)
+                return serialized
+        serialized = SerializedResponse.of(dump_rows(forecasts))
+        with self._lock:
+            self._entries[key] = serialized
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return serialized
+
+
+serialized_forecasts = SerializedForecasts()
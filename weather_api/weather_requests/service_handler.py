@@ -1,72 +1,160 @@
-import pycountry
+from datetime import datetime, timezone
+import asyncio
 
-from weather_api.weather_requests.clients.storage_clients.storage_clients import (
-    CSVStorageClient,
-    DBStorageClient,
+from loguru import logger
+
+from weather_api.weather_requests.clients.storage_clients.storage_clients import StorageClient
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import (
+    BadApiException,
+    BadCityException,
+    BaseWeatherClient,
+    CircuitOpenException,
+    ForecastBatch,
+    RateLimitException,
 )
-from weather_api.weather_requests.clients.weather_clients import (
-    openweathermap_client,
-    weatherapi_client,
+from weather_api.weather_requests.countries import country_name
+from weather_api.weather_requests.schemas import (
+    BatchWeatherResponseSchema,
+    CityRequestSchema,
+    WeatherResponseSchema,
 )
-from weather_api.weather_requests.schemas import WeatherResponseSchema
-from weather_api.weather_requests.storage_handlers import storage_handler
+from weather_api.weather_requests.single_flight import SingleFlight
+from weather_api.weather_requests.storage_handlers import batch_storage_handler, storage_handler
+from weather_api.weather_requests.write_behind import WriteBehindQueue
+
+provider_flights = SingleFlight()
 
 
 class NonexistentCountry(Exception):
     pass
 
 
-def get_request_helper(
-    weather_client: openweathermap_client.OpenWeatherMapClient
-    | weatherapi_client.WeatherAPIClient,
+async def get_request_helper(
+    weather_client: BaseWeatherClient,
     city_name: str,
     country_code: str,
-    storage_client: DBStorageClient | CSVStorageClient,
+    storage_client: StorageClient | WriteBehindQueue,
     days: int | None = None,
-) -> list[WeatherResponseSchema]:
+) -> ForecastBatch:
     """Helper for endpoints to get the request and check if empty.
-    Also send request to storage handler."""
-    request: list = weather_endpoint_handler(weather_client, city_name, country_code, days)
+    Also send request to storage handler, or to the write-behind queue."""
+    request = await weather_endpoint_handler(weather_client, city_name, country_code, days)
 
-    storage_handler(storage_client, request)
+    if isinstance(storage_client, WriteBehindQueue):
+        await storage_client.submit(request)
+    else:
+        await storage_handler(storage_client, request)
 
     return request
 
 
-def weather_endpoint_handler(
-    client: openweathermap_client.OpenWeatherMapClient | weatherapi_client.WeatherAPIClient,
+async def batch_request_helper(
+    weather_client: BaseWeatherClient,
+    cities: list[CityRequestSchema],
+    storage_client: StorageClient | WriteBehindQueue,
+    days: int | None = None,
+    concurrency: int = 10,
+) -> list[BatchWeatherResponseSchema]:
+    """Get the weather of many cities, at most concurrency provider calls at a time.
+    A failing city is reported in its item, the others are saved in a single storage call."""
+    semaphore = asyncio.Semaphore(concurrency)
+    batches: list[ForecastBatch] = []
+
+    async def city_weather(city: CityRequestSchema) -> BatchWeatherResponseSchema:
+        async with semaphore:
+            try:
+                forecasts = await weather_endpoint_handler(
+                    weather_client, city.city_name, city.country_code, days
+                )
+            except (
+                AttributeError,
+                BadApiException,
+                BadCityException,
+                IndexError,
+                NonexistentCountry,
+            ) as e:
+                return BatchWeatherResponseSchema(
+                    country_code=city.country_code,
+                    city_name=city.city_name,
+                    status_code=error_status_code(e),
+                    error=str(e),
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                logger.exception("Weather of {}, {} failed", city.city_name, city.country_code)
+                return BatchWeatherResponseSchema(
+                    country_code=city.country_code,
+                    city_name=city.city_name,
+                    status_code=500,
+                    error=repr(e),
+                )
+        batches.append(forecasts)
+        return BatchWeatherResponseSchema(
+            country_code=city.country_code,
+            city_name=city.city_name,
+            status_code=200,
+            forecasts=[WeatherResponseSchema.model_construct(**row) for row in forecasts.rows()],
+        )
+
+    results = await asyncio.gather(*(city_weather(city) for city in cities))
+
+    if isinstance(storage_client, WriteBehindQueue):
+        await storage_client.submit(*batches)
+    else:
+        await batch_storage_handler(storage_client, batches)
+
+    return list(results)
+
+
+def error_status_code(error: Exception) -> int:
+    """HTTP status matching the errors raised while getting the weather."""
+    if isinstance(error, (CircuitOpenException, RateLimitException)):
+        return 503
+    if isinstance(error, BadApiException):
+        return 500
+    return 404
+
+
+async def weather_endpoint_handler(
+    client: BaseWeatherClient,
     city_name: str,
     country_code: str,
     days: int | None = None,
-) -> list[WeatherResponseSchema]:
+) -> ForecastBatch:
     """Checks country code correctness.
     Then call the weather client methods for now and forecast.
     """
-    try:
-        pycountry.countries.get(alpha_2=country_code).name
-    except AttributeError:
+    if country_name(country_code) is None:
         raise NonexistentCountry(
             f"""{country_code} is not valid.
             Please refer to https://en.wikipedia.org/wiki/ISO_3166-1_alpha-2."""
         )
 
+    flight_key = (
+        client.provider_name,
+        city_name.strip().lower(),
+        country_code.lower(),
+        bool(days),
+    )
     if days:
-        request = client.get_long_weather_forecast(city_name, country_code, days)
+        # Every horizon shares the longest forecast, sliced to the requested days.
+        request = await provider_flights.do(
+            flight_key,
+            lambda: client.get_long_weather_forecast_async(
+                city_name, country_code, client.max_forecast_days
+            ),
+        )
+        request = request[:days]
     else:
-        request = client.get_current_weather(city_name, country_code)
-
-    days_forecast_list = []
-    for entry in request:
-        days_forecast_list.append(
-            WeatherResponseSchema(
-                date=entry.date,
-                weather_conditions=entry.weather_conditions,
-                temperature=entry.temperature,
-                wind_speed=entry.wind_speed,
-                humidity=entry.humidity,
-                city_name=entry.city_name,
-                country=entry.country,
-            )
+        request = await provider_flights.do(
+            flight_key, lambda: client.get_current_weather_async(city_name, country_code)
         )
 
-    return days_forecast_list
+    return ForecastBatch.of(request)
+
+
+def data_age(forecasts: ForecastBatch) -> int:
+    """Seconds since the forecasts were retrieved from the provider."""
+    if forecasts.retrieved_at is None:
+        return 0
+    age = datetime.now(timezone.utc) - forecasts.retrieved_at
+    return max(int(age.total_seconds()), 0)
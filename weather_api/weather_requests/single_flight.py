@@ -0,0 +1,30 @@
+"""Coalesce identical concurrent calls so only one of them reaches the provider."""
+
+from typing import Any, Awaitable, Callable, Hashable
+import asyncio
+
+
+def _retrieve_exception(task: asyncio.Future) -> None:
+    """Mark the exception as retrieved, callers already got it through shield."""
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """The first caller for a key starts the call, the others await the same result or error."""
+
+    def __init__(self) -> None:
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            task.add_done_callback(_retrieve_exception)
+        # A cancelled caller must not cancel the call the others are waiting for.
+        return await asyncio.shield(task)
@@ -1,33 +1,76 @@
 """Handles the data storage."""
+
+from typing import Any
+import inspect
 import uuid
 
 from weather_api.weather_requests.clients.storage_clients.storage_clients import (
-    CSVStorageClient,
+    AsyncDBStorageClient,
     DBStorageClient,
+    StorageClient,
 )
-from weather_api.weather_requests.schemas import WeatherResponseSchema
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
 from weather_api.weather_requests.weather_models import City, WeatherRequest
 
 
-def storage_handler(
-    client: DBStorageClient | CSVStorageClient, data: list[WeatherResponseSchema]
-) -> None:
+async def resolve(result: Any) -> Any:
+    """Await the result of the async storage clients, the others return it directly."""
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+async def storage_handler(client: StorageClient, data: ForecastBatch) -> None:
     """From a data list, create a db storage client, checks for existing city entries in db,
     finally send a list to the client to save in db."""
+    await batch_storage_handler(client, [data])
+
+
+async def batch_storage_handler(client: StorageClient, batch: list[ForecastBatch]) -> None:
+    """Same as storage_handler for the results of many cities, saved all at once.
+    The databases take the bulk path, the city upsert and one insert of every row."""
+    if isinstance(client, (DBStorageClient, AsyncDBStorageClient)):
+        await resolve(client.save_forecasts([ForecastBatch.of(data) for data in batch if data]))
+        return
+    new_cities: dict[tuple[str, str], City] = {}
     data_to_add_to_db = []
+    for data in batch:
+        if data:
+            data_to_add_to_db.extend(await build_storage_entries(client, data, new_cities))
+    if data_to_add_to_db:
+        await resolve(client.save(data_to_add_to_db))
 
-    city_entry = client.read(
-        model=City, filter={"city_name": data[0].city_name, "country": data[0].country}
-    )
+
+async def build_storage_entries(
+    client: StorageClient,
+    data: ForecastBatch,
+    new_cities: dict[tuple[str, str], City] | None = None,
+) -> list:
+    """Build the City, if not stored yet, and WeatherRequest entries of one city forecasts.
+    new_cities collects the cities created but not saved yet, so a batch creates each once."""
+    if new_cities is None:
+        new_cities = {}
+    data = ForecastBatch.of(data)
+    data_to_add_to_db = []
+    city_key = (data.city_name, data.country)
+
+    city_id = client.city_ids.get(*city_key) if client.city_ids is not None else None
+    if city_id is not None:
+        city_entry = City(id=city_id, country=data.country, city_name=data.city_name)
+    else:
+        city_entry = new_cities.get(city_key) or await resolve(
+            client.read(model=City, filter={"city_name": data.city_name, "country": data.country})
+        )
 
     if not city_entry:
         city_entry = City(
             id=uuid.uuid4(),
-            country=data[0].country,
-            city_name=data[0].city_name,
+            country=data.country,
+            city_name=data.city_name,
         )
+        new_cities[city_key] = city_entry
         data_to_add_to_db.append(city_entry)
-    else:
+    elif isinstance(city_entry, list):
         if isinstance(city_entry[0], dict):
             city_entry = City(
                 id=city_entry[0]["id"],
@@ -37,17 +80,21 @@ def storage_handler(
         else:
             city_entry = city_entry[0]
 
-    for dayforecast in data:
+    for date, weather_conditions, temperature, wind_speed, humidity in zip(
+        data.dates, data.weather_conditions, data.temperatures, data.wind_speeds, data.humidities
+    ):
         weather = WeatherRequest(
             id=uuid.uuid4(),
-            date=dayforecast.date,
-            weather_conditions=dayforecast.weather_conditions,
-            temperature=dayforecast.temperature,
-            wind_speed=dayforecast.wind_speed,
-            humidity=dayforecast.humidity,
+            date=date,
+            weather_conditions=weather_conditions,
+            temperature=temperature,
+            wind_speed=wind_speed,
+            humidity=humidity,
+            provider=data.provider,
+            observed_at=data.retrieved_at,
         )
         weather.city = city_entry  # type: ignore
 
         data_to_add_to_db.append(weather)
 
-    client.save(data_to_add_to_db)
+    return data_to_add_to_db
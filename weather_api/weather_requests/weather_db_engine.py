@@ -1,9 +1,156 @@
-from sqlalchemy.engine import Engine, create_engine
+"""Engines, connection pools and sessions of the sync and asyncio databases."""
+
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator
+
+from fastapi import Request
+from sqlalchemy import StaticPool, event
+from sqlalchemy.engine import URL, Engine, create_engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
 
 from weather_api.weather_requests.weather_models import Table
 
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
 
-def get_engine(database_url: str | None = None) -> Engine:
-    engine = create_engine(database_url, echo=True)
-    Table.metadata.create_all(bind=engine)
+
+def engine_options(
+    url: URL,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_timeout: float = 30,
+    echo: bool = False,
+) -> dict[str, Any]:
+    """Pool settings of the engines, sync or async.
+
+    An in-memory SQLite database only lives as long as its connection,
+    so it gets a single connection shared by every thread instead of a pool.
+    """
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            return {
+                "echo": echo,
+                "connect_args": {"check_same_thread": False},
+                "poolclass": StaticPool,
+            }
+        return {
+            "echo": echo,
+            "connect_args": {"check_same_thread": False},
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+        }
+    return {
+        "echo": echo,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_pre_ping": True,
+    }
+
+
+def enforce_foreign_keys(engine: Engine) -> None:
+    """SQLite checks the foreign keys only when each connection asks for it."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    def foreign_keys_on(dbapi_connection, _) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    event.listen(engine, "connect", foreign_keys_on)
+
+
+def get_engine(database_url: str, **options: Any) -> Engine:
+    """Create the engine and its connection pool, once per process."""
+    url = make_url(database_url)
+    engine = create_engine(url, **engine_options(url, **options))
+    enforce_foreign_keys(engine)
     return engine
+
+
+def async_url(database_url: str) -> URL:
+    """Same database through its asyncio driver, aiosqlite or asyncpg."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS and url.get_driver_name() not in ASYNC_DRIVERS.values():
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url
+
+
+def get_async_engine(database_url: str, **options: Any) -> AsyncEngine:
+    """Create the asyncio engine and its connection pool, once per process."""
+    url = async_url(database_url)
+    engine = create_async_engine(url, **engine_options(url, **options))
+    enforce_foreign_keys(engine.sync_engine)
+    return engine
+
+
+def create_schema(engine: Engine) -> None:
+    """Create the missing tables, at startup instead of on every request."""
+    Table.metadata.create_all(bind=engine)
+
+
+async def create_schema_async(engine: AsyncEngine) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(Table.metadata.create_all)
+
+
+@dataclass
+class Database:
+    """Engine of the app and the sessionmaker bound to it."""
+
+    engine: Engine
+    sessions: sessionmaker[Session]
+
+    @classmethod
+    def of(cls, engine: Engine) -> "Database":
+        return cls(engine, sessionmaker(bind=engine, autoflush=False))
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.engine.dispose()
+
+
+def get_session(request: Request) -> Iterator[Session | None]:
+    """Request scoped session of the database opened by the app lifespan, closed after the
+    request. None when no database is configured."""
+    database: Database | None = getattr(request.app.state, "database", None)
+    if database is None:
+        yield None
+        return
+    with database.sessions() as session:
+        yield session
+
+
+@dataclass
+class AsyncDatabase:
+    """Async engine of the app and the async sessionmaker bound to it."""
+
+    engine: AsyncEngine
+    sessions: async_sessionmaker[AsyncSession]
+
+    @classmethod
+    def of(cls, engine: AsyncEngine) -> "AsyncDatabase":
+        return cls(
+            engine, async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        )
+
+    async def close(self) -> None:
+        await self.engine.dispose()
+
+
+async def get_async_session(request: Request) -> AsyncIterator[AsyncSession | None]:
+    """Same as get_session for the asyncio database."""
+    database: AsyncDatabase | None = getattr(request.app.state, "async_database", None)
+    if database is None:
+        yield None
+        return
+    async with database.sessions() as session:
+        yield session
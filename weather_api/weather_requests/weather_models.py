@@ -1,8 +1,9 @@
 """DB Tables for weather data from api requests."""
+from datetime import datetime, timezone
 from typing import ClassVar, Never
 from uuid import UUID
 
-from sqlalchemy import ForeignKey, String, UniqueConstraint
+from sqlalchemy import DateTime, ForeignKey, Index, String, TypeDecorator, UniqueConstraint
 from sqlalchemy.orm import (  # type: ignore
     DeclarativeBase,
     Mapped,
@@ -17,6 +18,29 @@ class Table(DeclarativeBase):
     pass
 
 
+class UTCDateTime(TypeDecorator):
+    """Timezone aware timestamp stored in UTC.
+
+    Backends without a timezone type, as SQLite, give back naive datetimes,
+    those are read as UTC, as naive datetimes given to it.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value: datetime | None, dialect) -> datetime | None:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    def process_result_value(self, value: datetime | None, dialect) -> datetime | None:
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+
 class City(Table):
     """Table to store city name and country, by unique combinations"""
 
@@ -29,16 +53,20 @@ class City(Table):
 
 
 class WeatherRequest(Table):
-    """Table to store requests and weather conditions, with date"""
+    """Table to store requests and weather conditions, with date,
+    indexed by city and date for the history of a city."""
 
     __tablename__ = "weather_requests"
+    __table_args__ = (Index("ix_weather_requests_city_id_date", "city_id", "date"),)
 
     id: Mapped[UUID] = mapped_column(primary_key=True)
-    date: Mapped[str] = mapped_column(String(250), nullable=False)
+    date: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False)
     weather_conditions: Mapped[str] = mapped_column(String(250), nullable=False)
     temperature: Mapped[float] = mapped_column(nullable=False)
     wind_speed: Mapped[float] = mapped_column(nullable=False)
     humidity: Mapped[float] = mapped_column(nullable=False)
+    provider: Mapped[str | None] = mapped_column(String(64))
+    observed_at: Mapped[datetime | None] = mapped_column(UTCDateTime)
     city_id: Mapped[UUID] = mapped_column(ForeignKey("cities.id", ondelete="CASCADE"))
     city: ClassVar[RelationshipProperty[Never]] = relationship(
         "City", backref=backref("weather_conditions")
@@ -0,0 +1,125 @@
+"""Bounded write-behind queue saving forecasts off the response path."""
+
+from dataclasses import dataclass
+from typing import AsyncContextManager, Callable
+import asyncio
+
+from loguru import logger
+
+from weather_api.weather_requests.clients.storage_clients.storage_clients import (
+    AsyncDBStorageClient,
+    StorageClient,
+)
+from weather_api.weather_requests.clients.weather_clients.base_weather_client import ForecastBatch
+from weather_api.weather_requests.storage_handlers import batch_storage_handler
+
+OpenStorage = Callable[[], AsyncContextManager[StorageClient]]
+
+
+@dataclass
+class WriteBehindStats:
+    enqueued: int = 0
+    written: int = 0
+    flushes: int = 0
+    overflowed: int = 0
+    failed: int = 0
+
+
+class WriteBehindQueue:
+    """Forecasts are queued by the requests and saved by a background task,
+    in batches of batch_size rows or after flush_interval seconds, one transaction each.
+
+    A full queue does not drop forecasts, the request saves them itself
+    and the overflow is counted in the stats.
+    """
+
+    def __init__(
+        self,
+        open_storage: OpenStorage,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+    ) -> None:
+        self.open_storage = open_storage
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = WriteBehindStats()
+        self._queue: asyncio.Queue[ForecastBatch | None] = asyncio.Queue(max_size)
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def submit(self, *batches: ForecastBatch) -> None:
+        """Queue the forecasts, saving them right away when the queue is full."""
+        overflow = []
+        for batch in batches:
+            if not batch:
+                continue
+            try:
+                self._queue.put_nowait(batch)
+            except asyncio.QueueFull:
+                overflow.append(batch)
+            else:
+                self.stats.enqueued += len(batch)
+        if overflow:
+            self.stats.overflowed += sum(len(batch) for batch in overflow)
+            logger.warning("Write-behind queue full, saving {} cities inline", len(overflow))
+            await self.write(overflow)
+
+    async def run(self) -> None:
+        """Save the queued batches, merged up to batch_size rows, until closed."""
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            batch = await self._queue.get()
+            if batch is None:
+                break
+            batches, rows = [batch], len(batch)
+            deadline = loop.time() + self.flush_interval
+            while rows < self.batch_size:
+                try:
+                    batch = await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if batch is None:
+                    closing = True
+                    break
+                batches.append(batch)
+                rows += len(batch)
+            await self.write(batches)
+
+    async def write(self, batches: list[ForecastBatch]) -> None:
+        """Save the batches in a single storage call, errors are logged and counted.
+        The sync storage clients block, they save from a thread so the event loop goes on."""
+        rows = sum(len(batch) for batch in batches)
+        try:
+            async with self.open_storage() as client:
+                if isinstance(client, AsyncDBStorageClient):
+                    await batch_storage_handler(client, batches)
+                else:
+                    await asyncio.to_thread(
+                        lambda: asyncio.run(batch_storage_handler(client, batches))
+                    )
+        except Exception as e:  # pylint: disable=broad-except
+            self.stats.failed += rows
+            logger.error("Write-behind flush of {} rows failed: {!r}", rows, e)
+            return
+        self.stats.written += rows
+        self.stats.flushes += 1
+
+    async def close(self, timeout: float = 10) -> None:
+        """Save what is still queued, then stop the background task."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.error("Write-behind drain timed out, {} cities not saved", len(self))
+        self._task = None
+        logger.info("Write-behind queue closed: {}", self.stats)